@@ -0,0 +1,92 @@
+"""
+Measures what warm_up saves a freshly started worker.
+
+    python benchmarks/bench_startup.py [--models 50] [--columns 20]
+
+Prints the time to build every plan, to load them back from a plan cache file and the latency of the
+first serializer() call of each model with and without warm_up.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from mini_flask_serializer import MiniFlaskSerializer, warm_up
+from mini_flask_serializer import plan
+
+
+def build_app(models: int, columns: int):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db = SQLAlchemy(app)
+
+    classes = []
+
+    for i in range(models):
+        attrs = {"id": db.Column(db.Integer, primary_key=True)}
+
+        for c in range(columns):
+            attrs[f"field_{c}"] = db.Column(db.String(50))
+
+        attrs["__tablename__"] = f"model_{i}"
+        classes.append(type(f"Model{i}", (db.Model,), attrs))
+
+    return app, db, classes
+
+
+def first_calls(app, classes, columns: int) -> float:
+    serializer = MiniFlaskSerializer()
+
+    with app.app_context():
+        instances = [cls(id=1, **{f"field_{c}": "value" for c in range(columns)}) for cls in classes]
+
+        start = time.perf_counter()
+
+        for instance in instances:
+            serializer.serializer(instance)
+
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=50)
+    parser.add_argument("--columns", type=int, default=20)
+    args = parser.parse_args()
+
+    app, db, classes = build_app(args.models, args.columns)
+
+    plan._PLANS.clear()
+    cold = first_calls(app, classes, args.columns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "plans.json")
+
+        plan._PLANS.clear()
+        start = time.perf_counter()
+        warm_up(db, cache_path=cache_path)
+        build = time.perf_counter() - start
+
+        plan._PLANS.clear()
+        start = time.perf_counter()
+        warm_up(db, cache_path=cache_path)
+        load = time.perf_counter() - start
+
+    warm = first_calls(app, classes, args.columns)
+
+    print(f"models={args.models} columns={args.columns}")
+    print(f"warm_up build plans:        {build * 1000:8.2f} ms")
+    print(f"warm_up load plan cache:    {load * 1000:8.2f} ms")
+    print(f"first calls without warm_up:{cold * 1000:8.2f} ms ({cold / args.models * 1e6:.0f} us/model)")
+    print(f"first calls after warm_up:  {warm * 1000:8.2f} ms ({warm / args.models * 1e6:.0f} us/model)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+The sample app the load test runs against: list, detail and bulk-POST endpoints built on the serializer.
+
+    python -m benchmarks.loadtest.app --db /tmp/loadtest.sqlite3 [--port 5000]
+"""
+import argparse
+import datetime
+import os
+import sys
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from flask import Flask, jsonify, request
+from flask_sqlalchemy import SQLAlchemy
+
+from mini_flask_serializer import MiniFlaskSerializer
+from mini_flask_serializer.exception import ValidationError
+
+
+db = SQLAlchemy()
+
+
+class Author(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+
+
+class Post(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    author_id = db.Column(db.Integer, db.ForeignKey("author.id"), nullable=False)
+    author = db.relationship(Author)
+
+
+PAGE_SIZE = 50
+
+serializer = MiniFlaskSerializer()
+
+
+def create_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.abspath(db_path)}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    db.init_app(app)
+
+    @app.errorhandler(ValidationError)
+    def handle_validation_error(error):
+        return jsonify({"type": "ValidationError", "error": f"{error}"}), 400
+
+    @app.route("/posts")
+    def list_posts():
+        page = request.args.get("page", 1, type=int)
+        posts = Post.query.options(db.joinedload(Post.author)).order_by(Post.id).limit(PAGE_SIZE).offset((page - 1) * PAGE_SIZE).all()
+
+        return jsonify(serializer.serializer(posts, many=True, exclude_fields=["email", "author_id"]))
+
+    @app.route("/posts/<int:post_id>")
+    def get_post(post_id):
+        post = db.get_or_404(Post, post_id)
+
+        return jsonify(serializer.serializer(post, exclude_fields=["email"]))
+
+    @app.route("/posts/bulk", methods=["POST"])
+    def create_posts():
+        created = []
+
+        for fields in request.get_json():
+            # validate_data and save_to_model keep the data on the instance between the two calls,
+            # so every request needs its own serializer.
+            writer = MiniFlaskSerializer()
+            writer.validate_data(fields=fields, expected_fields=["title", "content", "author_id"])
+            created.append(writer.save_to_model(Post, db))
+
+        return jsonify(serializer.serializer(created, many=True, exclude_fields=["author"])), 201
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    create_app(args.db).run(port=args.port, threaded=True)
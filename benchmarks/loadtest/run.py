@@ -0,0 +1,240 @@
+"""
+End to end load test of the sample app in benchmarks/loadtest/app.py, fully offline.
+
+    python -m benchmarks.loadtest.run [--requests 2000] [--concurrency 8] [--modes threaded processes] [--processes 4]
+
+For every server mode it seeds a fresh SQLite file, starts the app, fires a seeded mix of list, detail and bulk-POST
+requests from concurrent client threads and prints the throughput and the p50/p95/p99 latency of each endpoint.
+
+    threaded:  one process running werkzeug's threaded server, a thread per request.
+    processes: --processes long lived worker processes, forked once before the test like gunicorn's sync workers.
+               They accept on one shared listening socket and serve one request at a time each, so their plans,
+               converters and database connections stay warm instead of being paid for on every request.
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from benchmarks.loadtest.app import PAGE_SIZE, create_app
+from benchmarks.loadtest.seed import seed
+
+
+HOST = "127.0.0.1"
+
+
+def _serve(db_path: str, port: int) -> None:
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server(HOST, port, create_app(db_path), threaded=True).serve_forever()
+
+
+def _serve_worker(db_path: str, port: int, fd: int) -> None:
+    """One prefork worker, accepting on the listening socket it inherited from the parent."""
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server(HOST, port, create_app(db_path), fd=fd).serve_forever()
+
+
+def start_servers(mode: str, db_path: str, port: int, processes: int) -> Tuple[List[multiprocessing.Process], socket.socket]:
+    """Returns the server processes and, in processes mode, the shared listening socket to close once they are stopped."""
+
+    context = multiprocessing.get_context("fork")
+
+    if mode == "threaded":
+        server = context.Process(target=_serve, args=(db_path, port), daemon=True)
+        server.start()
+
+        return [server], None
+
+    listener = socket.create_server((HOST, port), backlog=128)
+    workers = [context.Process(target=_serve_worker, args=(db_path, port, listener.fileno()), daemon=True) for _ in range(processes)]
+
+    for worker in workers:
+        worker.start()
+
+    return workers, listener
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+
+    raise RuntimeError(f"The server didn't start on port {port}.")
+
+
+def plan_requests(count: int, posts: int, authors: int, mix: Dict[str, int], bulk_size: int, rng: random.Random) -> List[Tuple[str, str, str, bytes]]:
+    """Returns (endpoint, method, path, body) tuples. The same rng seed always gives the same requests."""
+
+    endpoints = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    requests = []
+
+    for endpoint in endpoints:
+        if endpoint == "list":
+            requests.append((endpoint, "GET", f"/posts?page={rng.randint(1, max(posts // PAGE_SIZE, 1))}", None))
+        elif endpoint == "detail":
+            requests.append((endpoint, "GET", f"/posts/{rng.randint(1, posts)}", None))
+        else:
+            body = [
+                {"title": f"load test post {rng.randint(0, 10 ** 6)}", "content": "written by the load test", "author_id": rng.randint(1, authors)}
+                for _ in range(bulk_size)
+            ]
+            requests.append((endpoint, "POST", "/posts/bulk", json.dumps(body).encode("utf-8")))
+
+    return requests
+
+
+def _send(port: int, method: str, path: str, body: bytes) -> Tuple[float, int]:
+    conn = http.client.HTTPConnection(HOST, port, timeout=60)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+
+    started = time.perf_counter()
+
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+
+    return time.perf_counter() - started, status
+
+
+def percentile(latencies: List[float], pct: float) -> float:
+    """Nearest rank percentile of latencies, in seconds."""
+
+    if not latencies:
+        return 0.0
+
+    ordered = sorted(latencies)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def run_mode(mode: str, db_path: str, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    seed(db_path, authors=args.authors, posts=args.posts, seed=args.seed)
+
+    port = _free_port()
+    servers, listener = start_servers(mode, db_path, port, args.processes)
+
+    try:
+        _wait_for(port)
+
+        rng = random.Random(args.seed)
+        requests = plan_requests(args.requests, args.posts, args.authors, args.mix, args.bulk_size, rng)
+
+        # A few requests first so imports, plans and sqlite pages are warm.
+        for endpoint, method, path, body in requests[:min(20, len(requests))]:
+            _send(port, method, path, body)
+
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda r: (r[0],) + _send(port, r[1], r[2], r[3]), requests))
+
+        elapsed = time.perf_counter() - started
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.join()
+
+        if listener is not None:
+            listener.close()
+
+    report = {}
+
+    for endpoint in ["all"] + list(args.mix):
+        latencies = [latency for name, latency, _ in results if endpoint in ("all", name)]
+        errors = sum(1 for name, _, status in results if endpoint in ("all", name) and not 200 <= status < 300)
+
+        report[endpoint] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+
+    return report
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in ("list", "detail", "bulk"):
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name}")
+        mix[name] = int(weight)
+
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=None, help="The SQLite file to seed and use. Defaults to a temporary file.")
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--modes", nargs="+", choices=["threaded", "processes"], default=["threaded", "processes"])
+    parser.add_argument("--processes", type=int, default=4, help="Prefork worker processes in processes mode.")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("list=6,detail=3,bulk=1"))
+    parser.add_argument("--bulk-size", type=int, default=10)
+    args = parser.parse_args()
+
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "loadtest.sqlite3")
+
+        print(f"requests={args.requests} concurrency={args.concurrency} posts={args.posts} seed={args.seed}")
+        print(f"{'mode':<10}{'endpoint':<9}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+
+        for mode in args.modes:
+            for endpoint, row in run_mode(mode, db_path, args).items():
+                failed = failed or row["errors"] > 0
+                print(
+                    f"{mode:<10}{endpoint:<9}{row['requests']:>9}{row['errors']:>8}{row['rps']:>10.1f}"
+                    f"{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}{row['p99'] * 1000:>9.1f}"
+                )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Builds the SQLite database the load test runs against. The same seed always gives the same rows.
+
+    python -m benchmarks.loadtest.seed --db /tmp/loadtest.sqlite3 [--authors 200] [--posts 20000] [--seed 42]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from benchmarks.loadtest.app import Author, Post, create_app, db
+
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore magna aliqua".split()
+
+
+def seed(db_path: str, authors: int = 200, posts: int = 20_000, seed: int = 42) -> None:
+    """Creates (or recreates) db_path with authors and posts generated from seed."""
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    rng = random.Random(seed)
+    started = datetime.datetime(2025, 1, 1)
+    app = create_app(db_path)
+
+    with app.app_context():
+        db.create_all()
+
+        db.session.execute(Author.__table__.insert(), [
+            {"id": i, "name": f"author {i}", "email": f"author{i}@example.com"}
+            for i in range(1, authors + 1)
+        ])
+
+        for start in range(1, posts + 1, 10_000):
+            db.session.execute(Post.__table__.insert(), [
+                {
+                    "id": i,
+                    "title": " ".join(rng.choices(WORDS, k=rng.randint(3, 8))),
+                    "content": " ".join(rng.choices(WORDS, k=rng.randint(40, 200))),
+                    "created_at": started + datetime.timedelta(minutes=rng.randint(0, 500_000)),
+                    "author_id": rng.randint(1, authors),
+                }
+                for i in range(start, min(start + 10_000, posts + 1))
+            ])
+
+        db.session.commit()
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    seed(args.db, authors=args.authors, posts=args.posts, seed=args.seed)
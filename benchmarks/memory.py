@@ -0,0 +1,207 @@
+"""
+Memory regression harness: serializes large synthetic workloads under tracemalloc and fails when an allocation budget is exceeded.
+
+    python benchmarks/memory.py [--sizes 10000 100000 1000000] [--sources plain distinct sqlite] [--modes many stream]
+
+For every source (plain python objects like test/mock_db.py sharing a few authors, plain objects each with its own
+author, or SQLite backed Flask-SQLAlchemy models), mode
+(serializer(many=True) or stream(many=True)) and size it prints the peak and the retained bytes per object.
+Peak is the highest traced memory during the call, retained is what is still allocated once the result is dropped.
+The exit code is 1 when any of them goes over its budget in BUDGETS.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from mini_flask_serializer import MiniFlaskSerializer
+
+
+# Bytes per serialized object. serializer(many=True) keeps every result dict so its peak grows with the output,
+# stream() only holds one object and one chunk at a time so its peak per object should shrink as the size grows.
+# Plain objects retain ~64 B each because reading obj.__dict__ makes python build the instance dict once,
+# distinct ~128 B because every post brings its own author.
+BUDGETS: Dict[Tuple[str, str], Dict[str, float]] = {
+    ("plain", "many"): {"peak": 1000, "retained": 96},
+    ("plain", "stream"): {"peak": 200, "retained": 96},
+    ("distinct", "many"): {"peak": 1400, "retained": 160},
+    ("distinct", "stream"): {"peak": 250, "retained": 160},
+    ("sqlite", "many"): {"peak": 700, "retained": 16},
+    ("sqlite", "stream"): {"peak": 150, "retained": 16},
+}
+
+AUTHORS = 20
+
+
+class Author:
+    __tablename__ = "authors"
+
+    def __init__(self, id, name, email):
+        self.id = id
+        self.name = name
+        self.email = email
+
+
+class Post:
+    __tablename__ = "posts"
+
+    def __init__(self, id, title, body, author):
+        self.id = id
+        self.title = title
+        self.body = body
+        self.author = author
+
+
+def plain_objects(size: int) -> Tuple[List[Post], Callable[[], None]]:
+    authors = [Author(i, f"author {i}", f"author{i}@example.com") for i in range(AUTHORS)]
+    posts = [Post(i, f"post {i}", "lorem ipsum " * 4, authors[i % AUTHORS]) for i in range(size)]
+
+    return posts, lambda: None
+
+
+def distinct_objects(size: int) -> Tuple[List[Post], Callable[[], None]]:
+    """Every post has its own author, so nothing held on to for related objects can be shared between posts."""
+
+    posts = [Post(i, f"post {i}", "lorem ipsum " * 4, Author(i, f"author {i}", f"author{i}@example.com")) for i in range(size)]
+
+    return posts, lambda: None
+
+
+def sqlite_objects(size: int) -> Tuple[List, Callable[[], None]]:
+    from flask import Flask
+    from flask_sqlalchemy import SQLAlchemy
+
+    tmp = tempfile.TemporaryDirectory()
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp.name, 'memory.sqlite3')}"
+    db = SQLAlchemy(app)
+
+    class User(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(80))
+        email = db.Column(db.String(120))
+
+    class Article(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        title = db.Column(db.String(120))
+        body = db.Column(db.Text)
+        user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+        user = db.relationship(User)
+
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+
+    db.session.execute(User.__table__.insert(), [{"id": i + 1, "name": f"author {i}", "email": f"author{i}@example.com"} for i in range(AUTHORS)])
+
+    for start in range(0, size, 50_000):
+        db.session.execute(Article.__table__.insert(), [
+            {"id": i + 1, "title": f"post {i}", "body": "lorem ipsum " * 4, "user_id": i % AUTHORS + 1}
+            for i in range(start, min(start + 50_000, size))
+        ])
+
+    db.session.commit()
+
+    articles = Article.query.options(db.joinedload(Article.user)).all()
+
+    def close():
+        db.session.remove()
+        db.engine.dispose()
+        ctx.pop()
+        tmp.cleanup()
+
+    return articles, close
+
+
+SOURCES = {"plain": plain_objects, "distinct": distinct_objects, "sqlite": sqlite_objects}
+
+
+def run_many(serializer: MiniFlaskSerializer, objects: List) -> int:
+    result = serializer.serializer(objects, many=True)
+
+    return len(result)
+
+
+def run_stream(serializer: MiniFlaskSerializer, objects: List) -> int:
+    return sum(len(chunk) for chunk in serializer.stream(objects, many=True))
+
+
+MODES = {"many": run_many, "stream": run_stream}
+
+
+def measure(run: Callable[[MiniFlaskSerializer, List], int], objects: List) -> Dict[str, float]:
+    """Returns the peak and retained traced bytes per object of one run."""
+
+    serializer = MiniFlaskSerializer()
+
+    # A first small call so one-off allocations (class plans, converters) aren't counted against the budget.
+    run(serializer, objects[:10])
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+
+    run(serializer, objects)
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "peak": (peak - baseline) / len(objects),
+        "retained": max(current - baseline, 0) / len(objects),
+    }
+
+
+def check(source: str, mode: str, size: int, budgets: Dict[Tuple[str, str], Dict[str, float]] = BUDGETS) -> Tuple[Dict[str, float], List[str]]:
+    """Measures one workload. Returns the measurements and a message for every budget that was exceeded."""
+
+    objects, close = SOURCES[source](size)
+
+    try:
+        result = measure(MODES[mode], objects)
+    finally:
+        del objects
+        close()
+
+    failures = [
+        f"{source}/{mode}/{size}: {metric} {result[metric]:.0f} B/object is over the budget of {limit:.0f} B/object"
+        for metric, limit in budgets[(source, mode)].items()
+        if result[metric] > limit
+    ]
+
+    return result, failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--sources", nargs="+", choices=sorted(SOURCES), default=sorted(SOURCES))
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=sorted(MODES))
+    args = parser.parse_args()
+
+    failures = []
+
+    for source in args.sources:
+        for mode in args.modes:
+            for size in args.sizes:
+                result, failed = check(source, mode, size)
+                failures.extend(failed)
+
+                print(f"{source:<9}{mode:<8}{size:>9}  peak {result['peak']:8.0f} B/object  retained {result['retained']:6.1f} B/object{'  FAIL' if failed else ''}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,11 @@
 from .serializer import MiniFlaskSerializer
+from .cache import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend
+from .lazy import LazySerialized
+from .plan import warm_up
+from .profiler import SerializationProfiler
+from .snapshot import SnapshotRegistry
+from .provider import SerializerJSONProvider, init_app, stream_response
 
 
 __version__ = "2.0.0"
-__all__ = ["MiniFlaskSerializer"]
\ No newline at end of file
+__all__ = ["MiniFlaskSerializer", "LazySerialized", "SerializerJSONProvider", "init_app", "stream_response", "warm_up", "CacheBackend", "MemoryCacheBackend", "SQLiteCacheBackend", "SerializationProfiler", "SnapshotRegistry"]
\ No newline at end of file
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+
+class CacheBackend(ABC):
+    """
+        The interface MiniFlaskSerializer uses to cache serialized objects.
+
+        Subclass it to plug in your own store (Redis, memcached...). Only get_many, set_many and delete_many have
+        to be implemented, serializer(many=True) calls each of them at most once per call.
+        Values are the json strings of the serialized objects, so they can be stored as they are and a
+        caller changing its result never changes what the next call gets.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Returns a dictionary of the keys that were found and their values. Missing or expired keys are left out."""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, str], timeout: int = None) -> None:
+        """Stores every key and value of items. timeout is in seconds, None means never expire."""
+
+    @abstractmethod
+    def delete_many(self, keys: List[str]) -> None:
+        pass
+
+    def get(self, key: str) -> str:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: str, timeout: int = None) -> None:
+        self.set_many({key: value}, timeout=timeout)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Keeps serialized objects in a dictionary of the current process."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+
+                if entry is None:
+                    continue
+
+                value, expires = entry
+
+                if expires is not None and expires <= now:
+                    del self._data[key]
+                    continue
+
+                found[key] = value
+
+        return found
+
+    def set_many(self, items: Dict[str, str], timeout: int = None) -> None:
+        expires = time.time() + timeout if timeout is not None else None
+
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (value, expires)
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+        Keeps serialized objects in a SQLite file so every worker process on the host shares one warm cache.
+
+        Args:
+            path: The SQLite file to use. e.g "instance/serializer_cache.sqlite3". It is created if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, every worker opens its own.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS serializer_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+            self._pid = os.getpid()
+
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            conn = self._connection()
+
+            # SQLite limits the number of ? placeholders in a query.
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, value, expires FROM serializer_cache WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+
+                for key, value, expires in rows:
+                    if expires is None or expires > now:
+                        found[key] = value
+
+        return found
+
+    def set_many(self, items: Dict[str, str], timeout: int = None) -> None:
+        if not items:
+            return
+
+        expires = time.time() + timeout if timeout is not None else None
+        rows = [(key, value, expires) for key, value in items.items()]
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR REPLACE INTO serializer_cache (key, value, expires) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM serializer_cache WHERE key = ?", [(key,) for key in keys])
+            conn.execute("COMMIT")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM serializer_cache")
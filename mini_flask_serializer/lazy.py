@@ -0,0 +1,162 @@
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List
+
+
+_MISSING = object()
+
+
+class LazySerialized(Mapping):
+    """A read-only mapping returned by serializer(obj, lazy=True).
+    Each field is read from the object and serialized the first time you access it, then remembered.
+    Iterating over it or calling to_dict() serializes every remaining field."""
+
+    def __init__(self, serializer, obj: Any, exclude_fields: List[str] = None, include_fields: List[str] = None, max_depth: int = 2, _current_depth: int = 0, _memo: Dict[tuple, tuple] = None):
+        self._serializer = serializer
+        self._obj = obj
+        self._exclude_fields = exclude_fields or []
+        self._include_fields = include_fields or []
+        self._max_depth = max_depth
+        self._current_depth = _current_depth
+        self._visited = {id(obj)}
+        self._data = None
+        self._keys = None
+        self._cache = {}
+        self._memo = _memo
+
+    def _field_names(self) -> List[str]:
+        if self._keys is None:
+            use_whitelist = len(self._include_fields) > 0
+            self._data = self._serializer._source_data(self._obj)
+
+            if self._data is not None:
+                self._keys = [
+                    key for key in self._data.keys()
+                    if key not in self._exclude_fields and (not use_whitelist or key in self._include_fields)
+                ]
+            else:
+                self._keys = self._serializer._field_names(self._obj, exclude_fields=self._exclude_fields, include_fields=self._include_fields, use_whitelist=use_whitelist)
+
+        return self._keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._cache:
+            return self._cache[key]
+
+        if key not in self._field_names():
+            raise KeyError(key)
+
+        value = self._raw_value(key)
+
+        if self._serializer._omitted(value):
+            # serializer() leaves these fields out, so the mapping forgets them once it knows.
+            self._keys.remove(key)
+            raise KeyError(key)
+
+        value = self._profiled_convert(key, value)
+        self._cache[key] = value
+
+        return value
+
+    def _profiled_convert(self, key: str, value: Any) -> Any:
+        """Every field read is profiled like a serializer() call of its own, under the object's class name."""
+
+        profiler = self._serializer.profiler
+
+        if profiler is None:
+            return self._convert(key, value)
+
+        profiler.begin()
+
+        try:
+            if not profiler.active:
+                return self._convert(key, value)
+
+            root = profiler.at_root
+
+            if root:
+                profiler.push(type(self._obj).__name__)
+
+            profiler.push(self._serializer._profile_frame(key, value))
+            started = time.perf_counter()
+
+            try:
+                return self._convert(key, value)
+            finally:
+                elapsed = time.perf_counter() - started
+                profiler.pop(elapsed)
+
+                if root:
+                    profiler.pop(elapsed)
+        finally:
+            profiler.end()
+
+    def _raw_value(self, key: str) -> Any:
+        if self._data is not None:
+            return self._data[key]
+
+        return getattr(self._obj, key)
+
+    def _convert(self, key: str, value: Any) -> Any:
+        if self._data is not None:
+            return self._serializer._filter_data(
+                {key: value},
+                exclude_fields=self._exclude_fields,
+                include_fields=self._include_fields,
+                use_whitelist=False,
+                max_depth=self._max_depth,
+                _current_depth=self._current_depth,
+                _visited=self._visited,
+                _memo=self._memo
+            ).get(key)
+
+        if self._current_depth < self._max_depth:
+            return self._serializer._serialize_value(
+                value,
+                exclude_fields=self._exclude_fields,
+                include_fields=self._include_fields,
+                max_depth=self._max_depth,
+                _current_depth=self._current_depth,
+                _visited=self._visited.copy(),
+                _memo=self._memo
+            )
+
+        return self._serializer._serialize_simple_value(value)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._cache:
+            return True
+
+        if key not in self._field_names():
+            return False
+
+        if self._serializer.binary != "omit":
+            return True
+
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        if self._serializer.binary == "omit":
+            # Which fields are binary is only known once they are read.
+            return len(self.to_dict())
+
+        return len(self._field_names())
+
+    def __repr__(self) -> str:
+        return f"<LazySerialized {type(self._obj).__name__} resolved={list(self._cache)}>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializes every field that hasn't been accessed yet and returns a plain dict."""
+
+        result = {}
+
+        for key in list(self._field_names()):
+            try:
+                result[key] = self[key]
+            except KeyError:
+                pass
+
+        return result
@@ -0,0 +1,291 @@
+import base64
+import datetime
+import decimal
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from .exception import ValidationError
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError
+
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError
+
+        return int(value)
+
+    return int(str(value).strip())
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError
+
+    return float(value)
+
+
+def _to_decimal(value: Any) -> decimal.Decimal:
+    if isinstance(value, bool):
+        raise TypeError
+
+    try:
+        result = decimal.Decimal(str(value))
+    except decimal.InvalidOperation:
+        raise ValueError
+
+    if not result.is_finite():
+        raise ValueError
+
+    return result
+
+
+_TRUE = {"true", "1", "yes", "on"}
+_FALSE = {"false", "0", "no", "off"}
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+
+    raise ValueError
+
+
+def _to_str(value: Any) -> str:
+    if not isinstance(value, (str, int, float, decimal.Decimal)) or isinstance(value, bool):
+        raise TypeError
+
+    return str(value)
+
+
+def _to_datetime(value: Any) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+
+    # fromisoformat only understands a trailing Z from python 3.11
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _to_date(value: Any) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+
+    if isinstance(value, datetime.date):
+        return value
+
+    return datetime.date.fromisoformat(value)
+
+
+def _to_time(value: Any) -> datetime.time:
+    if isinstance(value, datetime.time):
+        return value
+
+    return datetime.time.fromisoformat(value)
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+
+    return base64.b64decode(value, validate=True)
+
+
+def _to_uuid(value: Any) -> uuid.UUID:
+    if isinstance(value, uuid.UUID):
+        return value
+
+    return uuid.UUID(str(value))
+
+
+# python type of the column -> (coercer, what the error message says it must be)
+COERCERS: Dict[type, Tuple[Callable[[Any], Any], str]] = {
+    int: (_to_int, "an integer"),
+    float: (_to_float, "a number"),
+    decimal.Decimal: (_to_decimal, "a number"),
+    bool: (_to_bool, "a boolean"),
+    str: (_to_str, "a string"),
+    datetime.datetime: (_to_datetime, "an ISO 8601 datetime"),
+    datetime.date: (_to_date, "an ISO 8601 date"),
+    datetime.time: (_to_time, "an ISO 8601 time"),
+    bytes: (_to_bytes, "base64 encoded bytes"),
+    uuid.UUID: (_to_uuid, "a UUID"),
+}
+
+
+class _Field:
+    __slots__ = ("key", "coerce", "expected", "nullable", "required", "max_length", "choices")
+
+    def __init__(self, key, coerce, expected, nullable, required, max_length, choices):
+        self.key = key
+        self.coerce = coerce
+        self.expected = expected
+        self.nullable = nullable
+        self.required = required
+        self.max_length = max_length
+        self.choices = choices
+
+
+class ModelLoader:
+    """
+        Turns json payloads into instances of a SQLAlchemy model, coercing every value to its column type.
+
+        The columns are inspected once when the loader is created, use loader_for(model) to get the shared loader of a model.
+    """
+
+    def __init__(self, model):
+        from sqlalchemy import Column, inspect as sa_inspect
+
+        self.model = model
+        self.fields: Dict[str, _Field] = {}
+
+        for prop in sa_inspect(model).column_attrs:
+            column = prop.columns[0]
+
+            # column_property(first + " " + last) is a read only expression, it is left out like any unknown field.
+            if not isinstance(column, Column):
+                continue
+            column_type = column.type
+
+            try:
+                python_type = column_type.python_type
+            except NotImplementedError:
+                python_type = None
+
+            coerce, expected = COERCERS.get(python_type, (None, None))
+
+            if column_type.__class__.__name__ == "JSON":
+                coerce, expected = None, None
+
+            has_default = column.default is not None or column.server_default is not None
+            autoincrement = column.primary_key and column is column.table.autoincrement_column
+
+            self.fields[prop.key] = _Field(
+                key=prop.key,
+                coerce=coerce,
+                expected=expected,
+                nullable=column.nullable or autoincrement,
+                required=not column.nullable and not has_default and not autoincrement,
+                max_length=getattr(column_type, "length", None) if python_type is str else None,
+                choices=set(column_type.enums) if getattr(column_type, "enums", None) else None
+            )
+
+    def coerce(self, data: Dict[str, Any], partial: bool = False) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Returns the coerced values and the errors of every field, in a single pass over data."""
+
+        values = {}
+        errors = {}
+
+        if not isinstance(data, dict):
+            return values, {"_schema": "Expected an object."}
+
+        fields = self.fields
+
+        for key, value in data.items():
+            field = fields.get(key)
+
+            if field is None:
+                errors[key] = f"{key} is not an expected field."
+                continue
+
+            if value is None:
+                if not field.nullable:
+                    errors[key] = f"{key} can't be null."
+                else:
+                    values[key] = None
+                continue
+
+            if field.coerce is not None:
+                try:
+                    value = field.coerce(value)
+                except (TypeError, ValueError, AttributeError):
+                    errors[key] = f"{key} must be {field.expected}."
+                    continue
+
+            if field.max_length is not None and len(value) > field.max_length:
+                errors[key] = f"{key} can't be longer than {field.max_length} characters."
+                continue
+
+            if field.choices is not None and value not in field.choices:
+                errors[key] = f"{key} must be one of {sorted(field.choices)}."
+                continue
+
+            values[key] = value
+
+        if not partial:
+            for key, field in fields.items():
+                if field.required and key not in data:
+                    errors[key] = f"{key} field is required."
+
+        return values, errors
+
+    def build(self, values: Dict[str, Any]) -> Any:
+        instance = self.model()
+
+        for key, value in values.items():
+            setattr(instance, key, value)
+
+        return instance
+
+    def load(self, data: Dict[str, Any], partial: bool = False) -> Any:
+        values, errors = self.coerce(data, partial=partial)
+
+        if errors:
+            raise _validation_error(errors)
+
+        return self.build(values)
+
+    def load_many(self, items: List[Dict[str, Any]], partial: bool = False) -> List[Any]:
+        """Coerces every item first and only builds instances when none of them has errors."""
+
+        coerced = []
+        errors = {}
+
+        for index, data in enumerate(items):
+            values, item_errors = self.coerce(data, partial=partial)
+
+            if item_errors:
+                errors[index] = item_errors
+            else:
+                coerced.append(values)
+
+        if errors:
+            raise _validation_error(errors)
+
+        return [self.build(values) for values in coerced]
+
+
+def _validation_error(errors: Dict[Any, Any]) -> ValidationError:
+    error = ValidationError(str(errors))
+    error.errors = errors
+
+    return error
+
+
+_LOADERS: Dict[type, ModelLoader] = {}
+
+
+def loader_for(model) -> ModelLoader:
+    """Returns the ModelLoader of model, compiling it the first time."""
+
+    loader = _LOADERS.get(model)
+
+    if loader is None:
+        loader = _LOADERS[model] = ModelLoader(model)
+
+    return loader
@@ -0,0 +1,128 @@
+import hashlib
+import inspect
+import json
+import os
+from typing import Dict, Tuple
+
+from .loader import loader_for
+
+
+SKIPPED_PREFIXES = ("_", "query", "registry", "metadata")
+
+_PLANS: Dict[type, Tuple[str, ...]] = {}
+
+
+def class_plan(cls: type) -> Tuple[str, ...]:
+    """
+        Returns the candidate field names for instances of cls, computed once per class.
+
+        A plan is what dir() used to give us for every object minus the private names, the flask-sqlalchemy
+        internals (query, registry, metadata) and the methods defined on the class.
+    """
+    plan = _PLANS.get(cls)
+
+    if plan is None:
+        plan = _PLANS[cls] = _build_plan(cls)
+
+    return plan
+
+
+def _build_plan(cls: type) -> Tuple[str, ...]:
+    names = []
+
+    for attr in dir(cls):
+        if attr.startswith(SKIPPED_PREFIXES):
+            continue
+
+        try:
+            static = inspect.getattr_static(cls, attr)
+        except AttributeError:
+            continue
+
+        if isinstance(static, (classmethod, staticmethod)) or callable(static):
+            continue
+
+        names.append(attr)
+
+    return tuple(names)
+
+
+def _fingerprint(cls: type) -> str:
+    """
+        Changes whenever a name _build_plan looks at is added, removed or changes kind, e.g a new column,
+        relationship, @property or plain class attribute, so a plan cache written by an older deploy is rebuilt.
+    """
+    kinds = {}
+
+    # The first class of the mro defining a name is the one getattr_static finds.
+    for klass in cls.__mro__:
+        for name, value in vars(klass).items():
+            if not name.startswith(SKIPPED_PREFIXES):
+                kinds.setdefault(name, f"{type(value).__module__}.{type(value).__qualname__}")
+
+    return hashlib.sha1(repr(sorted(kinds.items())).encode("utf-8")).hexdigest()
+
+
+def _cache_key(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def warm_up(db, cache_path: str = None) -> Dict[type, Tuple[str, ...]]:
+    """
+        Builds the serialization plan and the load() loader of every model mapped on your SQLAlchemy instance.
+
+        Call it while your app is being created (before gunicorn forks its workers, e.g with preload_app = True)
+        so every worker shares the plans instead of paying for them on its first requests.
+
+        Args:
+            db: Your SQLAlchemy instance. e.g db = SQLAlchemy().
+            cache_path: default=None: A json file to store the plans in. When it exists the plans are loaded
+                        from it instead of being recomputed, models that changed since the file was written are rebuilt.
+
+        Returns:
+            A dictionary of each model class and its plan.
+    """
+    from . import __version__
+
+    cached = {}
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+
+            if stored.get("version") == __version__:
+                cached = stored.get("plans", {})
+        except (OSError, ValueError):
+            cached = {}
+
+    plans = {}
+    changed = False
+
+    for mapper in db.Model.registry.mappers:
+        cls = mapper.class_
+        key = _cache_key(cls)
+        entry = cached.get(key)
+
+        if entry is not None and entry.get("fingerprint") == _fingerprint(cls):
+            _PLANS[cls] = tuple(entry["fields"])
+        else:
+            _PLANS.pop(cls, None)
+            changed = True
+
+        plans[cls] = class_plan(cls)
+        loader_for(cls)
+
+    if cache_path and changed:
+        stored = {
+            "version": __version__,
+            "plans": {
+                _cache_key(cls): {"fingerprint": _fingerprint(cls), "fields": list(plan)}
+                for cls, plan in plans.items()
+            }
+        }
+
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+
+    return plans
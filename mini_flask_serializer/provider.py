@@ -0,0 +1,143 @@
+import decimal
+from collections.abc import Mapping
+from typing import Any, List
+
+from flask import current_app, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from .serializer import MiniFlaskSerializer, RawDecimalEncoder, json_default
+
+
+class SerializerJSONProvider(DefaultJSONProvider):
+    """A flask JSON provider that encodes your SQLAlchemy model instances with MiniFlaskSerializer.
+    Once installed with init_app, jsonify(user) or returning a list of users from a view works without calling serializer() first."""
+
+    def __init__(self, app, serializer: MiniFlaskSerializer = None, max_depth: int = 2, exclude_fields: List[str] = None):
+        super().__init__(app)
+
+        self.serializer = serializer or MiniFlaskSerializer()
+        self.max_depth = max_depth
+        self.exclude_fields = exclude_fields or []
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if _is_iterable(obj):
+            # Query, ScalarResult and friends can only be iterated once.
+            obj = list(obj)
+
+        many = isinstance(obj, list) and len(obj) > 0 and all(_is_model(item) for item in obj)
+
+        if many or _is_model(obj):
+            if self.serializer.cache is None and "indent" not in kwargs:
+                # Straight to json text in one walk. The whole text is returned anyway, so the rows share one memo
+                # like serializer(many=True) does. Fields keep the serializer's order.
+                return "".join(self.serializer._iter_json(obj, exclude_fields=self.exclude_fields, include_fields=None, many=many, max_depth=self.max_depth, _memo={}))
+
+            # Cached entries are only read through serializer(), and indent is for debugging.
+            obj = self.serializer.serializer(obj, many=many, exclude_fields=self.exclude_fields, max_depth=self.max_depth)
+
+        kwargs.setdefault("default", self._default)
+
+        if self.serializer.decimal_format == "raw":
+            kwargs.setdefault("cls", RawDecimalEncoder)
+
+        return super().dumps(obj, **kwargs)
+
+    def _default(self, o: Any) -> Any:
+        """Called by json.dumps for every object it can't encode itself, e.g models nested in a dict you return."""
+
+        if isinstance(o, decimal.Decimal) and self.serializer.decimal_format == "raw":
+            return json_default(o)
+
+        if isinstance(o, Mapping):
+            # LazySerialized results are already serialized, they only need materializing.
+            return dict(o)
+
+        if _is_model(o):
+            return self.serializer.serializer(o, exclude_fields=self.exclude_fields, max_depth=self.max_depth)
+
+        if _is_iterable(o):
+            items = list(o)
+
+            if items and all(_is_model(item) for item in items):
+                # One call so the rows share related objects.
+                return self.serializer.serializer(items, many=True, exclude_fields=self.exclude_fields, max_depth=self.max_depth)
+
+            return items
+
+        return self.default(o)
+
+
+def _is_model(o: Any) -> bool:
+    return hasattr(o, "__tablename__") or hasattr(o, "_sa_instance_state") or hasattr(o, "to_dict") or hasattr(o, "to_json")
+
+
+def _is_iterable(o: Any) -> bool:
+    return hasattr(o, "__iter__") and not isinstance(o, (str, bytes, bytearray, Mapping))
+
+
+def init_app(app, serializer: MiniFlaskSerializer = None) -> SerializerJSONProvider:
+    """
+        Installs SerializerJSONProvider as app.json so jsonify and view return values encode your models in one pass.
+
+        Args:
+            app: Your flask app.
+            serializer: default=None: The MiniFlaskSerializer instance to use. A new one is created if you don't pass one in.
+
+        Config:
+            MINI_SERIALIZER_MAX_DEPTH: default=2: The max_depth passed to serializer().
+            MINI_SERIALIZER_EXCLUDE_FIELDS: default=[]: Fields excluded from every model, e.g ["password"].
+
+        Returns:
+            The installed provider.
+    """
+    app.config.setdefault("MINI_SERIALIZER_MAX_DEPTH", 2)
+    app.config.setdefault("MINI_SERIALIZER_EXCLUDE_FIELDS", [])
+
+    provider = SerializerJSONProvider(
+        app,
+        serializer=serializer,
+        max_depth=app.config["MINI_SERIALIZER_MAX_DEPTH"],
+        exclude_fields=app.config["MINI_SERIALIZER_EXCLUDE_FIELDS"]
+    )
+
+    app.json = provider
+    app.extensions["mini_flask_serializer"] = provider
+
+    return provider
+
+
+def stream_response(obj: Any, serializer: MiniFlaskSerializer = None, compress: bool = True, compress_level: int = 6, flush_size: int = 65536, **kwargs: Any):
+    """
+        Returns a streamed json Response of obj, gzip or deflate compressed when the client's Accept-Encoding allows it.
+
+        Compressed chunks are sent as soon as they are ready so big exports never sit whole in memory.
+
+        Args:
+            obj: The object, or with many=True the query or list of objects, to serialize.
+            serializer: default=None: The MiniFlaskSerializer to use. Defaults to the one installed by init_app, or a new one.
+            compress: default=True: Set to False to never compress, e.g when a proxy in front of you already does it.
+            compress_level: default=6: The zlib compression level.
+            flush_size: default=65536: How many bytes of json are compressed before they are flushed to the client.
+            kwargs: Passed to serializer.stream(), e.g many=True, exclude_fields=["password"].
+
+        Returns:
+            A flask Response.
+    """
+    if serializer is None:
+        provider = current_app.extensions.get("mini_flask_serializer")
+        serializer = provider.serializer if provider is not None else MiniFlaskSerializer()
+
+        if provider is not None:
+            kwargs.setdefault("exclude_fields", provider.exclude_fields)
+            kwargs.setdefault("max_depth", provider.max_depth)
+
+    encoding = request.accept_encodings.best_match(["gzip", "deflate"]) if compress else None
+    chunks = serializer.stream(obj, compress=encoding, compress_level=compress_level, flush_size=flush_size, **kwargs)
+
+    response = current_app.response_class(stream_with_context(chunks), mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+
+    return response
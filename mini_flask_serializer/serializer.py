@@ -1,16 +1,223 @@
-from typing import List, Dict, Any, Set
+import binascii
+import datetime
+import decimal
+import hashlib
+import json
+import time
+import zlib
+from typing import List, Dict, Any, Set, Callable, Iterator
 
+from .cache import CacheBackend
 from .exception import ValidationError
+from .lazy import LazySerialized
+from .loader import loader_for
+from .plan import SKIPPED_PREFIXES, class_plan
+from .profiler import SerializationProfiler
+
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+BINARY_POLICIES = ("base64", "hex", "omit")
+
+# A multiple of 3 so every base64 chunk but the last one has no padding.
+BINARY_CHUNK_SIZE = 3 * 16384
+
+# Content-Encoding -> zlib wbits. HTTP "deflate" is the zlib format, not raw deflate.
+COMPRESSIONS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+DATETIME_FORMATS = ("iso", "epoch_ms")
+DECIMAL_FORMATS = ("float", "string", "raw")
+
+
+class RawNumber(float):
+    """A Decimal on its way to RawDecimalEncoder, which writes text instead of the float's repr."""
+
+    def __new__(cls, value: decimal.Decimal):
+        number = super().__new__(cls, value)
+        number.text = str(value)
+
+        return number
+
+    def __repr__(self) -> str:
+        return self.text
+
+
+def json_default(value: Any) -> Any:
+    # json can't write a Decimal as a number, RawDecimalEncoder writes the RawNumber returned here digit for digit.
+    if isinstance(value, decimal.Decimal) and value.is_finite():
+        return RawNumber(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RawDecimalEncoder(json.JSONEncoder):
+    """
+        A JSONEncoder that writes Decimal values (decimal_format="raw") as exact json numbers.
+
+        The C encoder always writes floats with float.__repr__, so this one goes through the pure python
+        encoder with a float formatter that knows RawNumber. Only use it when there are Decimals to write.
+    """
+
+    def default(self, o: Any) -> Any:
+        return json_default(o)
+
+    def iterencode(self, o: Any, _one_shot: bool = False) -> Iterator[str]:
+        markers = {} if self.check_circular else None
+        encoder = json.encoder.encode_basestring_ascii if self.ensure_ascii else json.encoder.encode_basestring
+        allow_nan = self.allow_nan
+
+        def floatstr(value: float) -> str:
+            if type(value) is RawNumber:
+                return value.text
+
+            if value != value:
+                text = "NaN"
+            elif value == float("inf"):
+                text = "Infinity"
+            elif value == -float("inf"):
+                text = "-Infinity"
+            else:
+                return float.__repr__(value)
+
+            if not allow_nan:
+                raise ValueError(f"Out of range float values are not JSON compliant: {value!r}")
+
+            return text
+
+        iterencode = json.encoder._make_iterencode(
+            markers, self.default, encoder, self.indent, floatstr, self.key_separator,
+            self.item_separator, self.sort_keys, self.skipkeys, _one_shot
+        )
+
+        return iterencode(o, 0)
+
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+_raw_json_encoder = RawDecimalEncoder(separators=(",", ":"))
+
+
+def encode_json(value: Any) -> str:
+    """json.dumps that writes Decimal values (decimal_format="raw") as exact json numbers."""
+
+    return _raw_json_encoder.encode(value)
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=datetime.timezone.utc)
+_EPOCH_DATE = _EPOCH.date()
+_MILLISECOND = datetime.timedelta(milliseconds=1)
+
+
+def _datetime_epoch_ms(value: datetime.datetime) -> int:
+    # Naive datetimes are taken as UTC. Integer timedelta division keeps it exact, timestamp() goes through a float.
+    return (value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)) // _MILLISECOND
+
+
+def _date_epoch_ms(value: datetime.date) -> int:
+    return (value - _EPOCH_DATE) // _MILLISECOND
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _decimal_paths(value: Any, path: List[Any], found: List[list]) -> List[list]:
+    """Returns [path, text] of every Decimal in value, with the dict keys as json writes them."""
+
+    if isinstance(value, decimal.Decimal):
+        found.append([list(path), str(value)])
+
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            path.append(key if isinstance(key, str) else json.dumps(key))
+            _decimal_paths(item, path, found)
+            path.pop()
+
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            path.append(index)
+            _decimal_paths(item, path, found)
+            path.pop()
+
+    return found
+
+
+# The memo also holds, under this key, a [ids reached, met a circular reference] frame for every object being serialized.
+_OPEN = ("open",)
+_NOTHING_REACHED = frozenset()
+
+
+_JSON_SCALARS = {str, int, float, bool, type(None)}
+
+
+def _json_safe(value: Any) -> bool:
+    """True when value is made of json types only, checked by exact type so Decimal, datetime or subclasses fail."""
+
+    value_type = type(value)
+
+    if value_type in _JSON_SCALARS:
+        return True
+
+    if value_type is dict:
+        return all(_json_safe(item) for item in value.values())
+
+    if value_type is list:
+        return all(_json_safe(item) for item in value)
+
+    return False
 
 
 class MiniFlaskSerializer:
     """This mini_flask_serializer class is used to serializer an instance of your flask SQLAlchemy model.
     It return a json serialized format that you can use for your flask api."""
 
-    def __init__(self):
+    def __init__(self, cache: CacheBackend = None, cache_timeout: int = 300, cache_key: Callable[[Any], str] = None, profiler: SerializationProfiler = None, binary: str = "base64", datetime_format: str = "iso", decimal_format: str = "float", trust_after: int = 10):
+        """
+            Args:
+                cache: default=None: A CacheBackend (MemoryCacheBackend, SQLiteCacheBackend or your own) to store serialized objects in.
+                cache_timeout: default=300: How many seconds a cached object stays valid. None means until you delete it.
+                cache_key: default=None: A function returning the cache key of an object, or None to never cache it.
+                           By default SQLAlchemy instances are keyed by module, class name, primary key and their version
+                           (the mapper's version_id_col or an updated_at attribute). Instances without a version are only cached
+                           once invalidate_on_commit(db) deletes their entries when they change. Other objects are never cached.
+                profiler: default=None: A SerializationProfiler recording the time spent on every field path.
+                binary: default="base64": How bytes, bytearray and memoryview values (e.g LargeBinary columns) are written.
+                        "base64", "hex" or "omit" to leave those fields out.
+                datetime_format: default="iso": "iso" for ISO 8601 strings or "epoch_ms" for integer milliseconds since 1970-01-01 UTC
+                                 (naive datetimes are taken as UTC). time values are always ISO strings.
+                decimal_format: default="float": How Decimal values (Numeric columns) are written. "float", "string" to keep
+                                every digit, or "raw" to leave the Decimal as is for a json encoder that writes it as an exact number.
+                trust_after: default=10: After this many calls where a model's to_dict (or to_json) already returned only json
+                             values, its output is used as is instead of being walked again. Each result is still type checked
+                             and a non json value makes the model untrusted for good. None turns the check off.
+                             Set __serializer_trusted__ = True on a model to trust it straight away, or False to never trust it.
+                             A trusted to_dict must return a new dict each call, it is handed back without being copied.
+        """
+        if binary not in BINARY_POLICIES:
+            raise ValueError(f"binary must be one of {BINARY_POLICIES}.")
+
+        if datetime_format not in DATETIME_FORMATS:
+            raise ValueError(f"datetime_format must be one of {DATETIME_FORMATS}.")
+
+        if decimal_format not in DECIMAL_FORMATS:
+            raise ValueError(f"decimal_format must be one of {DECIMAL_FORMATS}.")
+
         self.serialize = {} #An attribute that returns a JSON object.
+        self.cache = cache
+        self.cache_timeout = cache_timeout
+        self.cache_key = cache_key or self._default_cache_key
+        self.profiler = profiler
+        self.binary = binary
+        self.datetime_format = datetime_format
+        self.decimal_format = decimal_format
+        self._converters: Dict[type, Callable[[Any], Any]] = {}
+        # The C encoder is a lot faster, the raw one is only needed when Decimals are left in the output.
+        self._encode_json = encode_json if decimal_format == "raw" else _json_encoder.encode
+        self.trust_after = trust_after
+        self._trust: Dict[type, int] = {}
+        self._cache_specs: Set[str] = set()
+        self._invalidating = False
 
-    def serializer(self, obj: Any, exclude_fields: List[str] = None, include_fields: List[str] = None, many: bool = False, max_depth: int = 2, _current_depth: int = 0, _visited: Set[int] = None) -> Dict[str, Any]:
+    def serializer(self, obj: Any, exclude_fields: List[str] = None, include_fields: List[str] = None, many: bool = False, max_depth: int = 2, lazy: bool = False, normalize: bool = False, _current_depth: int = 0, _visited: Set[int] = None) -> Dict[str, Any]:
         
         """
         Serialize an object with optional field filtering.
@@ -20,9 +227,13 @@ class MiniFlaskSerializer:
             exclude_fields: List of field names to exclude
             include_fields: List of field names to include (whitelist). This returns the fields name and values you specified in the include field.
             many: A boolean default to False for returning a single object of the model.
+            lazy: A boolean default to False. When True a LazySerialized mapping is returned that only serializes a field when you access it.
+            normalize: A boolean default to False. When True related objects are serialized once into an "included" table keyed by "ClassName:id"
+                       and referenced as {"$ref": "ClassName:id"}. The result becomes {"data": ..., "included": {...}}.
             
         Returns:
-            Dictionary of serialized data
+            Dictionary of serialized data. Related objects shared between items (e.g the author of many posts) are only serialized once per call
+            and the same dict is reused wherever they appear.
         """
 
         if _visited is None:
@@ -32,99 +243,583 @@ class MiniFlaskSerializer:
             if not hasattr(obj, "__iter__"):
                 raise ValueError("Cannot serialize on many=True on non-iterable objects.")
             
-            return [self._serializer(item, include_fields=include_fields, exclude_fields=exclude_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited) for item in obj]
-        
-        return self._serializer(obj, include_fields=include_fields, exclude_fields=exclude_fields, max_depth=max_depth, _visited=_visited, _current_depth=_current_depth)
+            if lazy:
+                return [LazySerialized(self, item, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _current_depth=_current_depth) for item in obj]
+
+        elif lazy:
+            return LazySerialized(self, obj, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _current_depth=_current_depth)
+
+        memo = {}
+        included = {} if normalize else None
+
+        if self.profiler is not None:
+            self.profiler.begin()
+
+        try:
+            if self.cache is not None and not normalize:
+                items = list(obj) if many else [obj]
+                result = self._serialize_cached(items, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited, _memo=memo)
+
+                return result if many else result[0]
+
+            if many:
+                result = [self._serializer(item, include_fields=include_fields, exclude_fields=exclude_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited.copy(), _memo=memo, _included=included) for item in obj]
+            else:
+                result = self._serializer(obj, include_fields=include_fields, exclude_fields=exclude_fields, max_depth=max_depth, _visited=_visited, _current_depth=_current_depth, _memo=memo, _included=included)
+
+            if normalize:
+                return {"data": result, "included": included}
+
+            return result
+        finally:
+            if self.profiler is not None:
+                self.profiler.end()
     
 
-    def _serializer(self, obj: Any, exclude_fields: List[str], include_fields: List[str], max_depth: int = 2, _current_depth: int = 0, _visited: Set[int] = None) -> Dict[str, Any]:
+    def stream(self, obj: Any, exclude_fields: List[str] = None, include_fields: List[str] = None, many: bool = False, max_depth: int = 2, chunk_size: int = 65536, compress: str = None, compress_level: int = 6, flush_size: int = 65536) -> Iterator[bytes]:
+        """
+            Serializes straight to json bytes, yielding chunks of about chunk_size bytes.
+
+            With many=True the objects are serialized one at a time so memory stays flat however long your query is,
+            and binary columns are encoded in pieces instead of as one huge string.
+
+            Args:
+                The same as serializer().
+                chunk_size: default=65536: The size in bytes of the chunks that are yielded.
+                compress: default=None: "gzip" or "deflate" to compress the chunks as they are produced.
+                compress_level: default=6: The zlib compression level, 1 is the fastest and 9 the smallest.
+                flush_size: default=65536: With compress, the compressor is flushed every flush_size bytes of json
+                            so compressed data leaves as soon as it is ready instead of piling up inside zlib.
+
+            Returns:
+                    An iterator of bytes. e.g return Response(serializer.stream(Post.query, many=True), mimetype="application/json")
+        """
+        if compress is not None and compress not in COMPRESSIONS:
+            raise ValueError(f"compress must be one of {tuple(COMPRESSIONS)}.")
+
+        # Checked here and not once iterating starts, by then stream_response has already sent a 200.
+        if many and not hasattr(obj, "__iter__"):
+            raise ValueError("Cannot serialize on many=True on non-iterable objects.")
+
+        chunks = self._iter_chunks(obj, exclude_fields=exclude_fields, include_fields=include_fields, many=many, max_depth=max_depth, chunk_size=chunk_size)
+
+        if compress is None:
+            return chunks
+
+        return self._compress_chunks(chunks, wbits=COMPRESSIONS[compress], level=compress_level, flush_size=flush_size)
+
+
+    def _iter_chunks(self, obj: Any, exclude_fields: List[str], include_fields: List[str], many: bool, max_depth: int, chunk_size: int) -> Iterator[bytes]:
+        buffer = []
+        size = 0
+
+        for part in self._iter_json(obj, exclude_fields=exclude_fields, include_fields=include_fields, many=many, max_depth=max_depth):
+            buffer.append(part)
+            size += len(part)
+
+            if size >= chunk_size:
+                yield "".join(buffer).encode("utf-8")
+                buffer = []
+                size = 0
+
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+
+    def _compress_chunks(self, chunks: Iterator[bytes], wbits: int, level: int, flush_size: int) -> Iterator[bytes]:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        pending = 0
+
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+
+            if pending >= flush_size:
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+
+    def _iter_json(self, obj: Any, exclude_fields: List[str], include_fields: List[str], many: bool, max_depth: int, _memo: Dict[tuple, tuple] = None) -> Iterator[str]:
+        """Yields obj as json text field by field. Pass _memo to share one memo between the items when the whole output is kept anyway."""
+
+        profiler = self.profiler
+
+        if profiler is not None:
+            profiler.begin()
+
+        try:
+            if many:
+                yield "["
+
+            for index, item in enumerate(obj if many else (obj,)):
+                if index:
+                    yield ","
+
+                # One memo per item by default, a memo kept for the whole stream would hold every related object until the end.
+                lazy = LazySerialized(self, item, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _memo=_memo if _memo is not None else {})
+                first = True
+                # The time spent by whoever reads the chunks between two yields is not counted.
+                profiled = profiler is not None and profiler.active
+                item_spent = 0.0
+
+                if profiled:
+                    profiler.push(type(item).__name__)
+
+                yield "{"
+
+                for key in lazy._field_names():
+                    value = lazy._raw_value(key)
+
+                    if self._omitted(value):
+                        continue
+
+                    yield f'{"" if first else ","}{self._encode_json(key)}:'
+                    first = False
+
+                    if not profiled:
+                        if isinstance(value, BINARY_TYPES):
+                            yield from self._iter_binary(value)
+                        else:
+                            yield self._encode_json(lazy._convert(key, value))
+                        continue
+
+                    profiler.push(self._profile_frame(key, value))
+                    started = time.perf_counter()
+                    spent = 0.0
+
+                    if isinstance(value, BINARY_TYPES):
+                        for part in self._iter_binary(value):
+                            spent += time.perf_counter() - started
+                            yield part
+                            started = time.perf_counter()
+
+                        spent += time.perf_counter() - started
+                        profiler.pop(spent)
+                    else:
+                        part = self._encode_json(lazy._convert(key, value))
+                        spent += time.perf_counter() - started
+                        profiler.pop(spent)
+                        yield part
+
+                    item_spent += spent
+
+                if profiled:
+                    profiler.pop(item_spent)
+
+                yield "}"
+
+            if many:
+                yield "]"
+        finally:
+            if profiler is not None:
+                profiler.end()
+
+
+    def _serialize_cached(self, items: List[Any], exclude_fields: List[str], include_fields: List[str], max_depth: int, _current_depth: int, _visited: Set[int], _memo: Dict[tuple, tuple]) -> List[Dict[str, Any]]:
+        """Serializes items through self.cache with one get_many and one set_many call."""
+
+        # Serializers sharing a backend only share entries when they write the same output.
+        spec = hashlib.sha1(repr((
+            max_depth, sorted(exclude_fields or []), sorted(include_fields or []), self.binary, self.datetime_format, self.decimal_format
+        )).encode("utf-8")).hexdigest()[:12]
+        self._cache_specs.add(spec)
+        keys = []
+
+        for item in items:
+            key = self.cache_key(item)
+            keys.append(f"mfs:{key}:{spec}" if key is not None else None)
+
+        hits = self.cache.get_many([key for key in keys if key is not None])
+        misses = {}
+        result = []
+
+        for item, key in zip(items, keys):
+            if key is not None and key in hits:
+                result.append(self._decode_cached(hits[key]))
+                continue
+
+            data = self._serializer(item, include_fields=include_fields, exclude_fields=exclude_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited.copy(), _memo=_memo)
+
+            if key is not None:
+                misses[key] = self._encode_cached(data)
+
+            result.append(data)
+
+        if misses:
+            self.cache.set_many(misses, timeout=self.cache_timeout)
+
+        return result
+
+
+    def _encode_cached(self, data: Dict[str, Any]) -> str:
+        """
+            Returns the cache entry of data. With decimal_format="raw" the entry is [data, [[path, text], ...]]
+            so the Decimals come back as Decimals and every other number keeps its own type.
+        """
+        if self.decimal_format != "raw":
+            return self._encode_json(data)
+
+        return self._encode_json([data, _decimal_paths(data, [], [])])
+
+
+    def _decode_cached(self, entry: str) -> Dict[str, Any]:
+        if self.decimal_format != "raw":
+            return json.loads(entry)
+
+        data, decimals = json.loads(entry)
+
+        for path, text in decimals:
+            if not path:
+                return decimal.Decimal(text)
+
+            container = data
+
+            for step in path[:-1]:
+                container = container[step]
+
+            container[path[-1]] = decimal.Decimal(text)
+
+        return data
+
+
+    def _default_cache_key(self, obj: Any) -> str:
+        state = getattr(obj, "_sa_instance_state", None)
+        identity = getattr(state, "identity", None)
+
+        if not identity:
+            return None
+
+        cls = type(obj)
+        key = f"{cls.__module__}.{cls.__qualname__}:{','.join(str(i) for i in identity)}"
+        version = self._version(obj, state)
+
+        if version is not None:
+            return f"{key}:{version}"
+
+        # Without a version an update would keep being served from the cache, unless commits delete the entry.
+        return key if self._invalidating else None
+
+
+    def _version(self, obj: Any, state: Any) -> Any:
+        """Returns the value of the mapper's version_id_col or of an updated_at attribute, or None when obj has neither."""
+
+        version_column = getattr(state.mapper, "version_id_col", None)
+
+        if version_column is not None:
+            return getattr(obj, state.mapper.get_property_by_column(version_column).key, None)
+
+        return getattr(obj, "updated_at", None)
+
+
+    def invalidate_on_commit(self, db) -> None:
+        """
+            Deletes the cached entries of the instances your session updates or deletes, once their commit is done.
+            Call it once with your SQLAlchemy instance, e.g serializer.invalidate_on_commit(db).
+
+            Only the entries of the fields combinations this process has cached are deleted, cache_timeout still bounds the others.
+        """
+        from sqlalchemy import event
+
+        event.listen(db.session, "after_flush", self._after_flush)
+        event.listen(db.session, "after_commit", self._after_commit)
+        event.listen(db.session, "after_rollback", self._after_rollback)
+        self._invalidating = True
+
+
+    def _after_flush(self, session, flush_context) -> None:
+        changed = session.info.setdefault("mini_flask_serializer_cache_keys", set())
+
+        for instance in list(session.dirty) + list(session.deleted):
+            key = self.cache_key(instance)
+
+            if key is not None:
+                changed.add(key)
+
+
+    def _after_commit(self, session) -> None:
+        changed = session.info.pop("mini_flask_serializer_cache_keys", None)
+
+        if changed and self.cache is not None:
+            specs = tuple(self._cache_specs)
+            self.cache.delete_many([f"mfs:{key}:{spec}" for key in changed for spec in specs])
+
+
+    def _after_rollback(self, session) -> None:
+        session.info.pop("mini_flask_serializer_cache_keys", None)
+
+
+    def _serializer(self, obj: Any, exclude_fields: List[str], include_fields: List[str], max_depth: int = 2, _current_depth: int = 0, _visited: Set[int] = None, _memo: Dict[tuple, tuple] = None, _included: Dict[str, Any] = None) -> Dict[str, Any]:
 
         if _visited is None:
-            _visited - set()
+            _visited = set()
 
         obj_id = id(obj)
 
         if obj_id in _visited:
+            if _memo is not None and _memo.get(_OPEN):
+                _memo[_OPEN][-1][1] = True
+
             return {"CIRCULAR REFERENCE": True}
-        
+
+        if _memo is not None:
+            memo_key = (obj_id, _current_depth)
+            entry = _memo.get(memo_key)
+            opened = _memo.setdefault(_OPEN, [])
+
+            # A result is reused only when none of the objects in it is an ancestor here, those would be circular references.
+            if entry is not None and entry[2].isdisjoint(_visited):
+                if opened:
+                    opened[-1][0].update(entry[2])
+                    opened[-1][0].add(obj_id)
+
+                return entry[1]
+
+            frame = [set(), False]
+            opened.append(frame)
+
         _visited.add(obj_id)
 
         result = {}
 
+        profiler = self.profiler if self.profiler is not None and self.profiler.active else None
+        profile_root = profiler is not None and profiler.at_root
+
+        if profile_root:
+            profiler.push(type(obj).__name__)
+            started = time.perf_counter()
+
         exclude_fields = exclude_fields or []
         include_fields = include_fields or []
         use_whitelist = len(include_fields) > 0
 
-        if hasattr(obj, "to_dict") and callable(getattr(obj, "to_dict", None)):
-            try:
-                data: Dict[str, Any] = obj.to_dict()
-
-                return self._filter_data(
-                    data,
-                    exclude_fields=exclude_fields,
-                    include_fields=include_fields,
-                    use_whitelist=use_whitelist,
-                    max_depth=max_depth,
-                    _current_depth=_current_depth,
-                    _visited=_visited
-                )
-            except (AttributeError, TypeError):
-                pass
-        
+        data = self._source_data(obj)
 
-        if hasattr(obj, "to_json") and callable(getattr(obj, "to_json", None)):
-            try:
-                data: Dict[str, Any] = obj.to_json()
-
-                return self._filter_data(
-                    data,
-                    exclude_fields=exclude_fields,
-                    include_fields=include_fields,
-                    use_whitelist=use_whitelist,
-                    max_depth=max_depth,
-                    _current_depth=_current_depth,
-                    _visited=_visited
-                )
-            except (AttributeError, TypeError):
-                pass
-    
-        for attr in dir(obj):
-            if attr.startswith("_") or callable(getattr(obj, attr)):
-                continue
-            if attr.startswith("query"):
-                continue
-            if attr.startswith("registry"):
-                continue
-            if attr.startswith("metadata"):
-                continue
+        trusted = self._trusted_result(type(obj), data, exclude_fields=exclude_fields, include_fields=include_fields, use_whitelist=use_whitelist) if data is not None else None
+
+        if trusted is not None:
+            result = trusted
+
+        elif data is not None:
+            result = self._filter_data(
+                data,
+                exclude_fields=exclude_fields,
+                include_fields=include_fields,
+                use_whitelist=use_whitelist,
+                max_depth=max_depth,
+                _current_depth=_current_depth,
+                _visited=_visited,
+                _memo=_memo,
+                _included=_included
+            )
+
+            if self.trust_after is not None and self._trust.get(type(obj), 0) >= 0:
+                self._verify_trust(type(obj), data, result, exclude_fields=exclude_fields, include_fields=include_fields, use_whitelist=use_whitelist)
+        else:
+            for attr in self._field_names(obj, exclude_fields=exclude_fields, include_fields=include_fields, use_whitelist=use_whitelist):
+                if profiler is not None:
+                    field_started = time.perf_counter()
+
+                value = getattr(obj, attr)
+
+                if callable(value):
+                    continue
+
+                if self.binary == "omit" and isinstance(value, BINARY_TYPES):
+                    continue
+
+                if profiler is not None:
+                    profiler.push(self._profile_frame(attr, value))
+
+                if _current_depth < max_depth:
+                    result[attr] = self._serialize_value(
+                        value,
+                        exclude_fields=exclude_fields,
+                        include_fields=include_fields,
+                        max_depth=max_depth,
+                        _current_depth=_current_depth,
+                        _visited=_visited.copy(),
+                        _memo=_memo,
+                        _included=_included
+                    )
+                else:
+                    result[attr] = self._serialize_simple_value(value)
+
+                if profiler is not None:
+                    profiler.pop(time.perf_counter() - field_started)
+
+        if profile_root:
+            profiler.pop(time.perf_counter() - started)
+
+        if _memo is not None:
+            opened.pop()
+            reached, circular = frame
+
+            if opened:
+                opened[-1][0].update(reached)
+                opened[-1][0].add(obj_id)
+                opened[-1][1] = opened[-1][1] or circular
+
+            # A result with a circular reference depends on the ancestors it was reached from, it can't be reused.
+            # Holding on to obj keeps its id from being reused by another object during this call.
+            if not circular:
+                _memo[memo_key] = (obj, result, frozenset(reached) if reached else _NOTHING_REACHED)
+
+        return result
+
+
+    def _serialize_related(self, obj: Any, exclude_fields: List[str], include_fields: List[str], max_depth: int, _current_depth: int, _visited: Set[int], _memo: Dict[tuple, tuple] = None, _included: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Serializes a related object. With normalize=True it is stored once in the included table and a reference is returned instead."""
+
+        if _included is None:
+            return self._serializer(obj, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited, _memo=_memo, _included=_included)
+
+        key = self._entity_key(obj)
+
+        if key not in _included:
+            _included[key] = None
+            _included[key] = self._serializer(obj, exclude_fields=exclude_fields, include_fields=include_fields, max_depth=max_depth, _current_depth=_current_depth, _visited=_visited, _memo=_memo, _included=_included)
+
+        return {"$ref": key}
+
+
+    def _entity_key(self, obj: Any) -> str:
+        """Returns "ClassName:primary_key" for an object, falling back to its id attribute and then to id(obj)."""
+
+        state = getattr(obj, "_sa_instance_state", None)
+        identity = getattr(state, "identity", None)
+
+        if identity:
+            ident = ",".join(str(i) for i in identity)
+        else:
+            ident = getattr(obj, "id", None)
+
+            if ident is None:
+                ident = id(obj)
+
+        return f"{type(obj).__name__}:{ident}"
+
+
+    def _is_trusted(self, cls: type, data: Any) -> bool:
+        """True when cls's to_dict/to_json output can skip _filter_data, see trust_after."""
+
+        if type(data) is not dict:
+            return False
+
+        trusted = getattr(cls, "__serializer_trusted__", None)
+
+        if trusted is not None:
+            return trusted
+
+        return self.trust_after is not None and self._trust.get(cls, 0) >= self.trust_after
+
+
+    def _trusted_result(self, cls: type, data: Any, exclude_fields: List[str], include_fields: List[str], use_whitelist: bool) -> Dict[str, Any]:
+        """Returns the fields of data when cls's output can skip _filter_data, otherwise None."""
+
+        if not self._is_trusted(cls, data):
+            return None
+
+        if not exclude_fields and not use_whitelist:
+            result = data
+        else:
+            result = {k: v for k, v in data.items() if k not in exclude_fields and (not use_whitelist or k in include_fields)}
+
+        # Earned trust is still type checked, a nullable column can be None for the first rows and a datetime later on.
+        if getattr(cls, "__serializer_trusted__", None) is None and not _json_safe(result):
+            self._trust[cls] = -1
+            return None
+
+        return result
+
+
+    def _verify_trust(self, cls: type, data: Dict[str, Any], result: Dict[str, Any], exclude_fields: List[str], include_fields: List[str], use_whitelist: bool) -> None:
+        """
+            Counts the calls where to_dict returned only json types and _filter_data gave it back unchanged.
+            Equal isn't enough on its own, Decimal("10.25") == 10.25. One failed call and cls is never trusted.
+        """
+
+        if getattr(cls, "__serializer_trusted__", None) is not None or type(data) is not dict:
+            return
+
+        expected = {k: v for k, v in data.items() if k not in exclude_fields and (not use_whitelist or k in include_fields)}
+
+        if _json_safe(expected) and result == expected:
+            self._trust[cls] = self._trust.get(cls, 0) + 1
+        else:
+            self._trust[cls] = -1
+
+
+    def _source_data(self, obj: Any) -> Dict[str, Any]:
+        """Returns what the object's to_dict or to_json method gives back, or None when it has neither."""
+
+        for method in ("to_dict", "to_json"):
+            if hasattr(obj, method) and callable(getattr(obj, method, None)):
+                try:
+                    data = getattr(obj, method)()
+
+                    if isinstance(data, str):
+                        try:
+                            data = json.loads(data)
+                        except json.JSONDecodeError:
+                            return {}
+
+                    if hasattr(data, "items"):
+                        return data
+                except (AttributeError, TypeError):
+                    pass
+
+        return None
+
+
+    def _field_names(self, obj: Any, exclude_fields: List[str], include_fields: List[str], use_whitelist: bool) -> List[str]:
+        """
+            Returns the public attribute names of obj that pass the exclude and include fields.
+
+            Nothing is read from obj here, the names come from its class plan and its __dict__ so properties, relationships
+            and deferred columns are only loaded when they are actually serialized.
+            Names listed in the model's __serializer_opt_in__ (e.g an expensive @property) are skipped unless they are in include_fields.
+        """
+
+        names = []
+        candidates = class_plan(type(obj))
+        opt_in = getattr(type(obj), "__serializer_opt_in__", ())
+        instance_dict = getattr(obj, "__dict__", {})
+        instance_attrs = [k for k in instance_dict if not k.startswith(SKIPPED_PREFIXES) and k not in candidates]
+
+        if instance_attrs:
+            candidates = sorted(set(candidates).union(instance_attrs))
+
+        for attr in candidates:
             if attr in exclude_fields:
                 continue
             if use_whitelist and attr not in include_fields:
                 continue
+            if attr in opt_in and attr not in include_fields:
+                continue
+            if callable(instance_dict.get(attr)):
+                continue
 
-            value = getattr(obj, attr)
+            names.append(attr)
 
-            if _current_depth < max_depth:
-                result[attr] = self._serialize_value(
-                    value,
-                    exclude_fields=exclude_fields,
-                    include_fields=include_fields,
-                    max_depth=max_depth,
-                    _current_depth=_current_depth,
-                    _visited=_visited.copy()
-                )
-            else:
-                result[attr] = self._serialize_simple_value(value)
-
-        return result
+        return names
     
 
-    def _serialize_value(self, value: Any, exclude_fields: List[str], include_fields: List[str], max_depth: int, _current_depth: int, _visited: Set[int]) -> Any:
+    def _serialize_value(self, value: Any, exclude_fields: List[str], include_fields: List[str], max_depth: int, _current_depth: int, _visited: Set[int], _memo: Dict[tuple, tuple] = None, _included: Dict[str, Any] = None) -> Any:
         if value is None:
             return None
         
         if isinstance(value, (str, int, float, bool)):
             return value
+
+        converter = self._converter(type(value))
+
+        if converter is not None:
+            return converter(value)
         
         if hasattr(value, "isoformat"):
             try:
@@ -140,13 +835,15 @@ class MiniFlaskSerializer:
                 
                     if hasattr(item, "__tablename__") or hasattr(item, "_sa_instance_state"):
 
-                        serialized = self._serializer(
+                        serialized = self._serialize_related(
                             item,
                             exclude_fields=exclude_fields,
                             include_fields=include_fields,
                             max_depth=max_depth,
                             _current_depth=_current_depth + 1,
-                            _visited=_visited.copy()
+                            _visited=_visited.copy(),
+                            _memo=_memo,
+                            _included=_included
                         )
 
                         result.append(serialized)
@@ -158,7 +855,9 @@ class MiniFlaskSerializer:
                             include_fields=include_fields,
                             max_depth=max_depth,
                             _current_depth=_current_depth + 1,
-                            _visited=_visited.copy()
+                            _visited=_visited.copy(),
+                            _memo=_memo,
+                            _included=_included
                         )
                         result.append(serialized)
 
@@ -178,20 +877,24 @@ class MiniFlaskSerializer:
                         include_fields=include_fields,
                         max_depth=max_depth,
                         _current_depth=_current_depth + 1,
-                        _visited=_visited.copy()
+                        _visited=_visited.copy(),
+                        _memo=_memo,
+                        _included=_included
                     )
                     for k, v in value.items()
             }
         
         
         if hasattr(value, "__tablename__") or hasattr(value, "to_json") or hasattr(value, "to_dict") or hasattr(value, "_sa_instance_state"):
-            return self._serializer(
+            return self._serialize_related(
                         value,
                         exclude_fields=exclude_fields,
                         include_fields=include_fields,
                         max_depth=max_depth,
                         _current_depth=_current_depth + 1,
-                        _visited=_visited
+                        _visited=_visited,
+                        _memo=_memo,
+                        _included=_included
                     )
         
 
@@ -207,20 +910,10 @@ class MiniFlaskSerializer:
         if isinstance(value, (str, float, int, bool)):
             return value
 
-        
-        if isinstance(value, bytes):
-            try:
-                return value.decode("utf-8")
-            except:
-                return str(value)
-
-        try:
-            from decimal import Decimal
+        converter = self._converter(type(value))
 
-            if isinstance(value, Decimal):
-                return float(value)
-        except ImportError:
-            pass
+        if converter is not None:
+            return converter(value)
 
         if hasattr(value, "_sa_instance_state"):
             if hasattr(value, "to_dict") and callable(getattr(value, "to_dict", None)):
@@ -246,7 +939,71 @@ class MiniFlaskSerializer:
         except:
             return None     
 
-    def _filter_data(self, data: Any, exclude_fields: List[str], include_fields: List[str], use_whitelist: bool, max_depth: int = 2, _current_depth: int = 0, _visited: Set[int] = None) -> Dict[str, Any]:
+    def _converter(self, value_type: type) -> Callable[[Any], Any]:
+        """
+            Returns the function that converts values of value_type (datetimes, Decimal, binary...), or None when it
+            goes through the generic path. It is looked up once per type and then read from self._converters.
+        """
+        try:
+            return self._converters[value_type]
+        except KeyError:
+            pass
+
+        converter = None
+
+        if issubclass(value_type, datetime.datetime):
+            converter = _datetime_epoch_ms if self.datetime_format == "epoch_ms" else value_type.isoformat
+        elif issubclass(value_type, datetime.date):
+            converter = _date_epoch_ms if self.datetime_format == "epoch_ms" else value_type.isoformat
+        elif issubclass(value_type, datetime.time):
+            converter = value_type.isoformat
+        elif issubclass(value_type, decimal.Decimal):
+            converter = {"float": float, "string": str, "raw": _identity}[self.decimal_format]
+        elif issubclass(value_type, BINARY_TYPES):
+            converter = self._encode_binary
+
+        self._converters[value_type] = converter
+
+        return converter
+
+
+    def _omitted(self, value: Any) -> bool:
+        """True when value is left out of the output altogether, binary values with binary="omit"."""
+
+        return self.binary == "omit" and isinstance(value, BINARY_TYPES)
+
+
+    def _encode_binary(self, value: Any) -> str:
+        """Encodes bytes, bytearray and memoryview in one call without copying or iterating over them."""
+
+        if self.binary == "hex":
+            return value.hex()
+
+        if self.binary == "omit":
+            return None
+
+        return binascii.b2a_base64(value, newline=False).decode("ascii")
+
+
+    def _iter_binary(self, value: Any, chunk_size: int = BINARY_CHUNK_SIZE) -> Iterator[str]:
+        """Yields a binary value as a json string a chunk at a time so a large LargeBinary column is never encoded in one piece."""
+
+        view = memoryview(value).cast("B")
+
+        yield '"'
+
+        for start in range(0, len(view), chunk_size):
+            chunk = view[start:start + chunk_size]
+
+            if self.binary == "hex":
+                yield chunk.hex()
+            else:
+                yield binascii.b2a_base64(chunk, newline=False).decode("ascii")
+
+        yield '"'
+
+
+    def _filter_data(self, data: Any, exclude_fields: List[str], include_fields: List[str], use_whitelist: bool, max_depth: int = 2, _current_depth: int = 0, _visited: Set[int] = None, _memo: Dict[tuple, tuple] = None, _included: Dict[str, Any] = None) -> Dict[str, Any]:
         """Helper methods to add exclude and include fields to to_dict and to_json method of the object model you want to serialize."""
 
         if _visited is None:
@@ -256,12 +1013,11 @@ class MiniFlaskSerializer:
 
         if isinstance(data, str):
             try:
-                import json
-
                 data: Dict[str, Any] = json.loads(data)
             except json.JSONDecodeError:
                 return {}
 
+        profiler = self.profiler if self.profiler is not None and self.profiler.active else None
 
         for key, value in data.items():
             if key in exclude_fields:
@@ -270,6 +1026,13 @@ class MiniFlaskSerializer:
             if use_whitelist and key not in include_fields:
                 continue
 
+            if self.binary == "omit" and isinstance(value, BINARY_TYPES):
+                continue
+
+            if profiler is not None:
+                field_started = time.perf_counter()
+                profiler.push(self._profile_frame(key, value))
+
             if _current_depth < max_depth:
                 result[key] = self._serialize_value(
                         value,
@@ -277,12 +1040,26 @@ class MiniFlaskSerializer:
                         include_fields=include_fields,
                         max_depth=max_depth,
                         _current_depth=_current_depth + 1,
-                        _visited=_visited.copy()
+                        _visited=_visited.copy(),
+                        _memo=_memo,
+                        _included=_included
                     )
             else:
                 result[key] = self._serialize_simple_value(value)
 
+            if profiler is not None:
+                profiler.pop(time.perf_counter() - field_started)
+
         return result
+
+
+    def _profile_frame(self, name: str, value: Any) -> str:
+        """Field paths mark lists with [] e.g Post.author.posts[].title."""
+
+        if hasattr(value, "__iter__") and not isinstance(value, (str, dict, bytes)):
+            return f"{name}[]"
+
+        return name
     
 
     def validate_data(self, fields: Dict[str, Any], expected_fields: List[str] = False) -> Dict[str, Any]:
@@ -326,6 +1103,32 @@ class MiniFlaskSerializer:
         return self.serialize
 
 
+    def load(self, model, data: Any, many: bool = False, partial: bool = False) -> Any:
+        """
+            Turns your api data into instances of your SQLAlchemy model, converting every value to the type of its column.
+            e.g "42" becomes 42 for an Integer column and "2025-09-20T10:00:00" a datetime for a DateTime column.
+
+            All the fields are checked before anything is created so bad data fails here and not when you commit.
+
+            Args:
+                model: The model class you want instances of. e.g User, don't pass in User().
+                data: A dictionary gotten from your flask api, or a list of them with many=True.
+                many: A boolean default to False. Set it to True when data is a list.
+                partial: A boolean default to False. When True required fields may be left out, e.g for a PATCH request.
+
+            Returns:
+                    An instance of model (not added to your session) or a list of them with many=True.
+                    A ValidationError is raised when a field can't be converted, is unknown or is missing.
+                    Its errors attribute holds a dictionary of field name to message (keyed by list index first with many=True).
+        """
+        loader = loader_for(model)
+
+        if many:
+            return loader.load_many(data, partial=partial)
+
+        return loader.load(data, partial=partial)
+
+
     def save_to_model(self, model_instance, model):
         """
             This function saves your request to the specified database only after it has been sanitized.
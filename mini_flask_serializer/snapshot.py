@@ -0,0 +1,278 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Set
+
+from sqlalchemy import event
+
+from .serializer import MiniFlaskSerializer
+
+
+class _Snapshot:
+    def __init__(self, name, query, tables, refresh_every, max_staleness, kwargs):
+        self.name = name
+        self.query = query
+        self.tables = tables
+        self.refresh_every = refresh_every
+        self.max_staleness = max_staleness
+        self.kwargs = kwargs
+        self.body = None
+        self.refreshed_at = None
+        self.stale_since = None
+        # Bumped by every mark_stale(), a refresh only clears stale_since when no commit came in while it ran.
+        self.generation = 0
+        self.refresh_count = 0
+        self.last_refresh_seconds = None
+        self.total_refresh_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def due(self, now: float) -> bool:
+        if self.body is None or self.stale_since is not None:
+            return True
+
+        return self.refresh_every is not None and now - self.refreshed_at >= self.refresh_every
+
+    def too_stale(self, now: float) -> bool:
+        """True when the body can't be served anymore and has to be rebuilt during the request."""
+
+        if self.body is None:
+            return True
+
+        if self.stale_since is not None and now - self.stale_since > self.max_staleness:
+            return True
+
+        return self.refresh_every is not None and now - self.refreshed_at > self.refresh_every + self.max_staleness
+
+
+class SnapshotRegistry:
+    """
+        Keeps the serialized json bytes of your hottest queries ready so a request only has to return them.
+
+        A snapshot is rebuilt by a background thread when a commit touches one of its tables, or every refresh_every seconds.
+        A request never gets a snapshot that is more than max_staleness seconds behind, it rebuilds it itself if it has to.
+
+        Args:
+            db: Your SQLAlchemy instance. e.g db = SQLAlchemy().
+            app: default=None: Your flask app. Needed to run queries from the background thread, call init_app later if you use a factory.
+            serializer: default=None: The MiniFlaskSerializer used to build the snapshots.
+            on_refresh: default=None: Called with the snapshot name and the seconds the refresh took, e.g to send it to statsd.
+    """
+
+    def __init__(self, db, app=None, serializer: MiniFlaskSerializer = None, on_refresh: Callable[[str, float], None] = None):
+        self.db = db
+        self.app = None
+        self.serializer = serializer or MiniFlaskSerializer()
+        self.on_refresh = on_refresh
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        event.listen(db.session, "after_flush", self._after_flush)
+        event.listen(db.session, "after_commit", self._after_commit)
+        event.listen(db.session, "after_rollback", self._after_rollback)
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        app.extensions["mini_flask_serializer_snapshots"] = self
+
+    def register(self, name: str, query: Callable[[], Any], tables: Iterable[str] = None, refresh_every: float = None, max_staleness: float = 5.0, **kwargs: Any) -> None:
+        """
+            Args:
+                name: The name you get the snapshot back with. e.g "latest_posts".
+                query: A function returning what to serialize with many=True. e.g lambda: Post.query.order_by(Post.id.desc()).limit(50)
+                tables: default=None: The table names whose commits make the snapshot stale. Defaults to the tables in the query,
+                        add the tables of the relationships you serialize.
+                refresh_every: default=None: Also rebuild the snapshot every this many seconds. Only commits made in this process
+                               are seen, so set it when other workers or scripts write to the tables too.
+                max_staleness: default=5.0: How many seconds a snapshot may be served after a commit made it stale.
+                kwargs: Passed to serializer.stream(), e.g exclude_fields=["password"].
+        """
+        self._snapshots[name] = _Snapshot(name, query, set(tables) if tables else None, refresh_every, max_staleness, kwargs)
+        self._wake.set()
+
+    def get(self, name: str) -> bytes:
+        """Returns the json bytes of the snapshot, rebuilding it first when it is missing or too stale."""
+
+        snapshot = self._snapshots[name]
+
+        if snapshot.too_stale(time.monotonic()):
+            with snapshot.lock:
+                # Requests that queued on the lock find the body another one just rebuilt.
+                if snapshot.too_stale(time.monotonic()):
+                    elapsed = self._rebuild(snapshot)
+                else:
+                    elapsed = None
+
+            if elapsed is not None and self.on_refresh is not None:
+                self.on_refresh(name, elapsed)
+
+        return snapshot.body
+
+    def response(self, name: str):
+        """Returns the snapshot as a flask Response."""
+
+        from flask import current_app
+
+        return current_app.response_class(self.get(name), mimetype="application/json")
+
+    def refresh(self, name: str) -> None:
+        """Rebuilds a snapshot now, in the calling thread."""
+
+        snapshot = self._snapshots[name]
+
+        with snapshot.lock:
+            elapsed = self._rebuild(snapshot)
+
+        if self.on_refresh is not None:
+            self.on_refresh(name, elapsed)
+
+    def _rebuild(self, snapshot: _Snapshot) -> float:
+        """Rebuilds the body of snapshot, with snapshot.lock held. Returns the seconds it took."""
+
+        started = time.perf_counter()
+        generation = snapshot.generation
+        query = snapshot.query()
+
+        if snapshot.tables is None:
+            snapshot.tables = _query_tables(query)
+
+        body = b"".join(self.serializer.stream(query, many=True, **snapshot.kwargs))
+        elapsed = time.perf_counter() - started
+
+        snapshot.body = body
+        snapshot.refreshed_at = time.monotonic()
+        snapshot.refresh_count += 1
+        snapshot.last_refresh_seconds = elapsed
+        snapshot.total_refresh_seconds += elapsed
+
+        # A commit that landed while we were querying keeps the snapshot stale.
+        if snapshot.generation == generation:
+            snapshot.stale_since = None
+
+        return elapsed
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Returns, for every snapshot, how many times and how long it took to refresh and how old it is in seconds."""
+
+        now = time.monotonic()
+
+        return {
+            name: {
+                "refresh_count": snapshot.refresh_count,
+                "last_refresh_seconds": snapshot.last_refresh_seconds,
+                "total_refresh_seconds": snapshot.total_refresh_seconds,
+                "age_seconds": now - snapshot.refreshed_at if snapshot.refreshed_at is not None else None,
+                "stale": snapshot.stale_since is not None,
+            }
+            for name, snapshot in self._snapshots.items()
+        }
+
+    def start(self) -> None:
+        """Starts the background thread that refreshes the snapshots. Start it in every worker, after gunicorn forks."""
+
+        if self.app is None:
+            raise RuntimeError("SnapshotRegistry needs an app to refresh in the background, pass app or call init_app.")
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="mini-flask-serializer-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """Stops the thread and removes the session event listeners."""
+
+        self.stop()
+
+        event.remove(self.db.session, "after_flush", self._after_flush)
+        event.remove(self.db.session, "after_commit", self._after_commit)
+        event.remove(self.db.session, "after_rollback", self._after_rollback)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            # Cleared before the scan so a mark_stale() landing during it wakes the next wait instead of being lost.
+            self._wake.clear()
+            now = time.monotonic()
+
+            for name, snapshot in list(self._snapshots.items()):
+                if self._stopping.is_set():
+                    return
+
+                if snapshot.due(now):
+                    with self.app.app_context():
+                        try:
+                            self.refresh(name)
+                        except Exception as e:
+                            self.app.logger.exception("Refreshing snapshot %s failed: %s", name, e)
+                        finally:
+                            self.db.session.remove()
+
+            self._wake.wait(self._next_wait())
+
+    def _next_wait(self) -> float:
+        now = time.monotonic()
+        waits = [
+            snapshot.refresh_every - (now - snapshot.refreshed_at)
+            for snapshot in self._snapshots.values()
+            if snapshot.refresh_every is not None and snapshot.refreshed_at is not None
+        ]
+
+        return max(min(waits), 0) if waits else None
+
+    def _after_flush(self, session, flush_context) -> None:
+        touched = session.info.setdefault("mini_flask_serializer_tables", set())
+
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(instance, "__table__", None)
+
+            if table is not None:
+                touched.add(table.name)
+
+    def _after_commit(self, session) -> None:
+        touched = session.info.pop("mini_flask_serializer_tables", None)
+
+        if touched:
+            self.mark_stale(touched)
+
+    def _after_rollback(self, session) -> None:
+        session.info.pop("mini_flask_serializer_tables", None)
+
+    def mark_stale(self, tables: Set[str]) -> None:
+        """Marks every snapshot reading one of tables as stale. Call it yourself after bulk updates that skip the session."""
+
+        now = time.monotonic()
+        marked = False
+
+        for snapshot in self._snapshots.values():
+            if snapshot.tables is None or snapshot.tables & set(tables):
+                snapshot.generation += 1
+                marked = True
+
+                if snapshot.stale_since is None:
+                    snapshot.stale_since = now
+
+        if marked:
+            self._wake.set()
+
+
+def _query_tables(query: Any) -> Set[str]:
+    from sqlalchemy.sql.util import find_tables
+
+    statement = getattr(query, "statement", query)
+
+    try:
+        return {table.name for table in find_tables(statement)}
+    except Exception:
+        return None
@@ -43,3 +43,20 @@ class Database3:
         self._is_active = True
 
 
+
+
+class Author:
+    __tablename__ = "authors"
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class Post:
+    __tablename__ = "posts"
+
+    def __init__(self, id, title, author):
+        self.id = id
+        self.title = title
+        self.author = author
@@ -1,10 +1,18 @@
 # test_flask_integration.py
+import datetime
+import decimal
+import gzip
+import json
+import os
+import tempfile
+import time
 import unittest
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
 # I installed the package in development mode to test it out here
-from mini_flask_serializer import MiniFlaskSerializer
+from mini_flask_serializer import MiniFlaskSerializer, SnapshotRegistry, init_app, stream_response, warm_up
+from mini_flask_serializer.exception import ValidationError
 
 class TestFlaskSQLAlchemyIntegration(unittest.TestCase):
     def setUp(self):
@@ -29,7 +37,15 @@ class TestFlaskSQLAlchemyIntegration(unittest.TestCase):
                     'email': self.email
                 }
         
+        class Event(self.db.Model):
+            id = self.db.Column(self.db.Integer, primary_key=True)
+            title = self.db.Column(self.db.String(20), nullable=False)
+            seats = self.db.Column(self.db.Integer)
+            starts_at = self.db.Column(self.db.DateTime)
+            public = self.db.Column(self.db.Boolean, default=True)
+
         self.User = User
+        self.Event = Event
         
         with self.app.app_context():
             self.db.create_all()
@@ -124,5 +140,324 @@ class TestFlaskSQLAlchemyIntegration(unittest.TestCase):
             self.assertEqual(result, expected)
             self.assertNotIn('email', result)
 
+    def test_init_app_jsonify_model(self):
+        """Test jsonify encodes a model instance through the installed provider"""
+        init_app(self.app)
+
+        with self.app.test_request_context():
+            user = self.User.query.first()
+            response = self.app.json.response(user)
+
+            self.assertEqual(response.get_json(), {
+                'id': 1,
+                'username': 'testuser',
+                'email': 'test@example.com'
+            })
+
+    def test_init_app_raw_decimals_and_marker_like_strings(self):
+        """Test strings shaped like a number marker stay strings and raw Decimals keep every digit"""
+        for decimal_format in ("float", "raw"):
+            init_app(self.app, MiniFlaskSerializer(decimal_format=decimal_format))
+
+            with self.app.app_context():
+                self.assertEqual(json.loads(self.app.json.dumps({"comment": "\x007\x00"})), {"comment": "\x007\x00"})
+
+        with self.app.app_context():
+            self.assertEqual(self.app.json.dumps({"price": decimal.Decimal("19.90")}), '{"price": 19.90}')
+
+    def test_init_app_view_returns_query_results(self):
+        """Test a view can return a list of model instances directly"""
+        init_app(self.app)
+
+        @self.app.route('/users')
+        def users():
+            return self.User.query.all()
+
+        response = self.app.test_client().get('/users')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), [{
+            'id': 1,
+            'username': 'testuser',
+            'email': 'test@example.com'
+        }])
+
+    def test_init_app_encodes_models_in_one_pass(self):
+        """Test models returned from a view are written straight to json, without building the dicts first"""
+        provider = init_app(self.app)
+        calls = []
+        serializer = provider.serializer.serializer
+        provider.serializer.serializer = lambda *args, **kwargs: calls.append(kwargs) or serializer(*args, **kwargs)
+
+        with self.app.app_context():
+            self.db.session.add(self.User(username='other', email='other@example.com', password_hash='hashed'))
+            self.db.session.commit()
+
+        @self.app.route('/users')
+        def users():
+            return self.User.query.all()
+
+        @self.app.route('/page')
+        def page():
+            return {"users": self.User.query, "total": 2}
+
+        client = self.app.test_client()
+
+        self.assertEqual([user['username'] for user in client.get('/users').get_json()], ['testuser', 'other'])
+        self.assertEqual(calls, [])
+
+        self.assertEqual(client.get('/page').get_json()['users'][1]['email'], 'other@example.com')
+        self.assertEqual([call.get('many') for call in calls], [True])
+
+    def test_init_app_profiles_models_returned_from_views(self):
+        """Test the profiler of the installed serializer records the views returning models"""
+        from mini_flask_serializer import SerializationProfiler
+
+        profiler = SerializationProfiler()
+        init_app(self.app, MiniFlaskSerializer(profiler=profiler))
+
+        @self.app.route('/users')
+        def users():
+            return self.User.query.all()
+
+        self.assertEqual(self.app.test_client().get('/users').status_code, 200)
+        self.assertEqual(profiler.stats()['User']['count'], 1)
+        self.assertEqual(profiler.stats()['User.username']['count'], 1)
+
+    def test_init_app_config_exclude_fields(self):
+        """Test MINI_SERIALIZER_EXCLUDE_FIELDS applies to every encoded model"""
+        self.app.config['MINI_SERIALIZER_EXCLUDE_FIELDS'] = ['email']
+        init_app(self.app)
+
+        with self.app.app_context():
+            user = self.User.query.first()
+
+            self.assertEqual(self.app.json.loads(self.app.json.dumps(user)), {
+                'id': 1,
+                'username': 'testuser'
+            })
+
+    def test_warm_up_builds_and_persists_plans(self):
+        """Test warm_up plans every mapped model and reloads them from the cache file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "plans.json")
+
+            plans = warm_up(self.db, cache_path=cache_path)
+            self.assertEqual(plans[self.User], ('email', 'id', 'password_hash', 'username'))
+
+            with open(cache_path) as f:
+                stored = json.load(f)
+
+            key = f"{self.User.__module__}:{self.User.__qualname__}"
+            self.assertEqual(stored["plans"][key]["fields"], ['email', 'id', 'password_hash', 'username'])
+
+            # A second process loads the same plans from the file
+            self.assertEqual(warm_up(self.db, cache_path=cache_path), plans)
+
+            # A deploy adding a property or a class attribute to a model rebuilds its plan
+            self.User.shout = property(lambda user: user.username.upper())
+            self.User.kind = "user"
+
+            self.assertEqual(warm_up(self.db, cache_path=cache_path)[self.User], ('email', 'id', 'kind', 'password_hash', 'shout', 'username'))
+
+    def test_default_cache_key_needs_a_version_or_invalidation(self):
+        """Test updated rows are never served from the cache by the default key"""
+        from mini_flask_serializer import MemoryCacheBackend
+
+        serializer = MiniFlaskSerializer(cache=MemoryCacheBackend())
+
+        with self.app.app_context():
+            user = self.User.query.first()
+            self.assertEqual(serializer.serializer(user)['username'], 'testuser')
+
+            user.username = 'changed'
+            self.db.session.commit()
+            self.assertEqual(serializer.serializer(self.User.query.first())['username'], 'changed')
+
+            serializer.invalidate_on_commit(self.db)
+
+            user = self.User.query.first()
+            self.assertEqual(serializer.serializer(user)['username'], 'changed')
+
+            # Cached until a commit touches the row
+            user.username = 'uncommitted'
+            self.assertEqual(serializer.serializer(user)['username'], 'changed')
+
+            self.db.session.commit()
+            self.assertEqual(serializer.serializer(self.User.query.first())['username'], 'uncommitted')
+
+    def test_load_coerces_column_types(self):
+        """Test load converts json values to the column types before anything is committed"""
+        with self.app.app_context():
+            event = self.serializer.load(self.Event, {
+                'title': 'Launch',
+                'seats': '120',
+                'starts_at': '2025-09-20T10:00:00',
+                'public': 'false'
+            })
+
+            self.assertIsInstance(event, self.Event)
+            self.assertEqual(event.seats, 120)
+            self.assertEqual(event.starts_at, datetime.datetime(2025, 9, 20, 10, 0))
+            self.assertIs(event.public, False)
+
+            self.db.session.add(event)
+            self.db.session.commit()
+            self.assertEqual(self.Event.query.count(), 1)
+
+    def test_load_collects_every_error(self):
+        """Test load reports all bad fields at once and creates nothing"""
+        with self.app.app_context():
+            with self.assertRaises(ValidationError) as ctx:
+                self.serializer.load(self.Event, {'seats': 'many', 'starts_at': 'tomorrow', 'colour': 'red'})
+
+            self.assertEqual(ctx.exception.errors, {
+                'seats': 'seats must be an integer.',
+                'starts_at': 'starts_at must be an ISO 8601 datetime.',
+                'colour': 'colour is not an expected field.',
+                'title': 'title field is required.'
+            })
+
+            # partial loads skip the required check
+            self.assertEqual(self.serializer.load(self.Event, {'seats': 3}, partial=True).seats, 3)
+
+    def test_load_and_warm_up_skip_column_properties(self):
+        """Test a column_property is a read only field for load and doesn't break warm_up"""
+        from sqlalchemy.orm import column_property
+
+        class Person(self.db.Model):
+            id = self.db.Column(self.db.Integer, primary_key=True)
+            first = self.db.Column(self.db.String(40), nullable=False)
+            last = self.db.Column(self.db.String(40), nullable=False)
+            full = column_property(first + " " + last)
+
+        with self.app.app_context():
+            self.db.create_all()
+            warm_up(self.db)
+
+            person = self.serializer.load(Person, {'first': 'ada', 'last': 'lovelace'})
+            self.assertEqual((person.first, person.last), ('ada', 'lovelace'))
+
+            with self.assertRaises(ValidationError) as ctx:
+                self.serializer.load(Person, {'first': 'ada', 'last': 'lovelace', 'full': 'ada lovelace'})
+
+            self.assertEqual(ctx.exception.errors, {'full': 'full is not an expected field.'})
+
+    def test_load_many(self):
+        """Test the batch form keys errors by list index"""
+        with self.app.app_context():
+            events = self.serializer.load(self.Event, [{'title': 'One'}, {'title': 'Two', 'seats': 2.0}], many=True)
+            self.assertEqual([(e.title, e.seats) for e in events], [('One', None), ('Two', 2)])
+
+            with self.assertRaises(ValidationError) as ctx:
+                self.serializer.load(self.Event, [{'title': 'One'}, {'title': 'x' * 21}], many=True)
+
+            self.assertEqual(ctx.exception.errors, {1: {'title': "title can't be longer than 20 characters."}})
+
+    def test_stream_response_negotiates_compression(self):
+        """Test stream_response gzips only when the client accepts it"""
+        self.app.config['MINI_SERIALIZER_EXCLUDE_FIELDS'] = ['email']
+        init_app(self.app)
+
+        @self.app.route('/export')
+        def export():
+            return stream_response(self.User.query, many=True)
+
+        client = self.app.test_client()
+        expected = [{'id': 1, 'username': 'testuser'}]
+
+        response = client.get('/export', headers={'Accept-Encoding': 'gzip, deflate;q=0.5'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.data)), expected)
+
+        response = client.get('/export')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_json(), expected)
+
+    def test_snapshot_is_rebuilt_after_commit_touching_its_table(self):
+        """Test a stale snapshot is rebuilt during the request once max_staleness has passed"""
+        snapshots = SnapshotRegistry(self.db, self.app)
+        self.addCleanup(snapshots.close)
+        snapshots.register('users', lambda: self.User.query.order_by(self.User.id), max_staleness=0, exclude_fields=['password_hash'])
+
+        with self.app.app_context():
+            self.assertEqual(json.loads(snapshots.get('users')), [{'email': 'test@example.com', 'id': 1, 'username': 'testuser'}])
+
+            # Commits to other tables leave it alone
+            self.db.session.add(self.Event(title='Launch'))
+            self.db.session.commit()
+            self.assertFalse(snapshots.metrics()['users']['stale'])
+
+            self.db.session.add(self.User(username='second', email='second@example.com'))
+            self.db.session.commit()
+            self.assertTrue(snapshots.metrics()['users']['stale'])
+
+            self.assertEqual([u['username'] for u in json.loads(snapshots.get('users'))], ['testuser', 'second'])
+
+        metrics = snapshots.metrics()['users']
+        self.assertEqual(metrics['refresh_count'], 2)
+        self.assertFalse(metrics['stale'])
+        self.assertGreater(metrics['last_refresh_seconds'], 0)
+
+    def test_snapshot_keeps_commits_made_while_refreshing(self):
+        """Test a commit landing during a refresh keeps the snapshot stale, and waiting requests don't rebuild it again"""
+        import threading
+
+        snapshots = SnapshotRegistry(self.db, self.app)
+        self.addCleanup(snapshots.close)
+        calls = []
+
+        def query():
+            calls.append(1)
+            time.sleep(0.05)
+
+            if len(calls) == 2:
+                # A commit right after the rows were read
+                snapshots.mark_stale({'user'})
+
+            return []
+
+        snapshots.register('users', query, tables=['user'], max_staleness=0)
+        snapshots.get('users')
+
+        snapshots.mark_stale({'user'})
+        snapshots.refresh('users')
+        self.assertTrue(snapshots.metrics()['users']['stale'])
+
+        threads = [threading.Thread(target=snapshots.get, args=('users',)) for _ in range(5)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(snapshots.metrics()['users']['refresh_count'], 3)
+        self.assertFalse(snapshots.metrics()['users']['stale'])
+
+    def test_snapshot_background_refresh(self):
+        """Test the background thread rebuilds a snapshot after a commit"""
+        refreshed = []
+        snapshots = SnapshotRegistry(self.db, self.app, on_refresh=lambda name, seconds: refreshed.append(name))
+        self.addCleanup(snapshots.close)
+        snapshots.register('users', lambda: self.User.query.order_by(self.User.id), max_staleness=60)
+        snapshots.start()
+
+        deadline = time.monotonic() + 5
+        while not refreshed and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with self.app.app_context():
+            self.db.session.add(self.User(username='second', email='second@example.com'))
+            self.db.session.commit()
+
+        while len(refreshed) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with self.app.app_context():
+            self.assertEqual(len(json.loads(snapshots.get('users'))), 2)
+
+        self.assertEqual(refreshed, ['users', 'users'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT_DIR)
+
+from benchmarks.memory import check
+
+
+@pytest.mark.parametrize("source", ["plain", "distinct", "sqlite"])
+@pytest.mark.parametrize("mode", ["many", "stream"])
+def test_memory_budget_10k(source, mode):
+    # The 100k and 1M runs take minutes under tracemalloc, run them with python benchmarks/memory.py
+    result, failures = check(source, mode, 10_000)
+
+    assert failures == [], result
@@ -1,3 +1,9 @@
+import datetime
+import decimal
+import gzip
+import json
+import zlib
+
 import pytest
 
 import sys
@@ -6,10 +12,11 @@ import os
 PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT_DIR)
 
-from .mock_db import Database1, Database2, Database3
+from .mock_db import Database1, Database2, Database3, Author, Post
 
-from mini_flask_serializer import MiniFlaskSerializer
+from mini_flask_serializer import MiniFlaskSerializer, CacheBackend, MemoryCacheBackend, SQLiteCacheBackend, SerializationProfiler
 from mini_flask_serializer.exception import ValidationError
+from mini_flask_serializer.serializer import encode_json
 
 @pytest.fixture
 def san():
@@ -224,4 +231,417 @@ def test_validate_data_agasints_api_fields(san):
         san.validate_data(fields={"-name": "John", "email": "john@gmail.com", "password": "123456"})
 
     with pytest.raises(ValidationError, match="name cannot start with an underscore _ or hypen -."):
-        san.validate_data(fields={"_name": "John", "email": "john@gmail.com", "password": "123456"})
\ No newline at end of file
+        san.validate_data(fields={"_name": "John", "email": "john@gmail.com", "password": "123456"})
+
+def test_lazy_serializes_only_accessed_fields(san):
+    reads = []
+
+    class Tracked(Database3):
+        def __getattribute__(self, name):
+            if not name.startswith("_") and name not in ("to_dict", "to_json"):
+                reads.append(name)
+            return object.__getattribute__(self, name)
+
+    result = san.serializer(Tracked(3, "ruth", "ruth@gmail.com", "1234567"), lazy=True)
+    reads.clear()
+
+    assert result["name"] == "ruth"
+    assert result["name"] == "ruth"
+    assert reads == ["name"]
+    assert "email" in result and len(result) == 4
+
+    assert dict(result) == {
+        "id": 3,
+        "name": "ruth",
+        "email": "ruth@gmail.com",
+        "password": "1234567"
+    }
+
+
+def test_lazy_with_to_dict_and_many(san):
+    db = [Database1(1, "john", "john@gmail.com", "123456"), Database1(2, "empress", "empress@gmail.com", "123456")]
+
+    result = san.serializer(db, many=True, lazy=True, exclude_fields=["password"])
+
+    assert result[1]["email"] == "empress@gmail.com"
+    assert "password" not in result[0]
+
+    with pytest.raises(KeyError):
+        result[0]["password"]
+
+    assert [item.to_dict() for item in result] == [
+        {"id": 1, "name": "john", "email": "john@gmail.com"},
+        {"id": 2, "name": "empress", "email": "empress@gmail.com"}
+    ]
+
+
+def test_shared_related_objects_are_serialized_once(san):
+    john, ruth = Author(1, "john"), Author(2, "ruth")
+    posts = [Post(i, f"post {i}", john if i % 2 else ruth) for i in range(1, 5)]
+
+    result = san.serializer(posts, many=True)
+
+    assert result[0] == {"author": {"id": 1, "name": "john"}, "id": 1, "title": "post 1"}
+    assert result[0]["author"] is result[2]["author"]
+    assert result[1]["author"] == {"id": 2, "name": "ruth"}
+
+
+def test_shared_objects_with_circular_references(san):
+    john = Author(1, "john")
+    posts = [Post(1, "first", john), Post(2, "second", john)]
+    john.posts = posts
+
+    result = san.serializer(posts, many=True)
+
+    assert result == [san.serializer(post) for post in posts]
+    assert result[1]["author"]["posts"][1] == {"CIRCULAR REFERENCE": True}
+
+    # Without a circular reference the first time, john still can't be reused under the post he points back to.
+    del john.posts
+    john.favourite = posts[1]
+
+    assert san.serializer(posts, many=True) == [san.serializer(post) for post in posts]
+
+
+def test_normalize_emits_shared_objects_once(san):
+    john = Author(1, "john")
+    posts = [Post(1, "first", john), Post(2, "second", john)]
+
+    assert san.serializer(posts, many=True, normalize=True) == {
+        "data": [
+            {"author": {"$ref": "Author:1"}, "id": 1, "title": "first"},
+            {"author": {"$ref": "Author:1"}, "id": 2, "title": "second"}
+        ],
+        "included": {
+            "Author:1": {"id": 1, "name": "john"}
+        }
+    }
+
+
+def test_cache_backend_serves_repeat_calls():
+    cache = MemoryCacheBackend()
+    san = MiniFlaskSerializer(cache=cache, cache_key=lambda obj: f"Database3:{obj.id}")
+    db = [Database3(1, "john", "john@gmail.com", "123456"), Database3(2, "ruth", "ruth@gmail.com", "123456")]
+
+    first = san.serializer(db, many=True, exclude_fields=["password"])
+    db[0].name = "changed"
+
+    assert san.serializer(db, many=True, exclude_fields=["password"]) == first
+    assert san.serializer(db[0], exclude_fields=["password"])["name"] == "john"
+    # Different fields are a different cache entry
+    assert san.serializer(db[0])["name"] == "changed"
+
+
+def test_cache_skips_objects_without_identity():
+    san = MiniFlaskSerializer(cache=MemoryCacheBackend())
+    db = Database3(1, "john", "john@gmail.com", "123456")
+
+    san.serializer(db)
+    db.name = "changed"
+
+    assert san.serializer(db)["name"] == "changed"
+
+
+def test_sqlite_cache_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    SQLiteCacheBackend(path).set_many({"a": '{"id":1}', "b": "[1,2]"})
+    other = SQLiteCacheBackend(path)
+
+    assert other.get_many(["a", "b", "c"]) == {"a": '{"id":1}', "b": "[1,2]"}
+
+    other.set("c", '{"id":3}', timeout=-1)
+    other.delete("a")
+
+    assert other.get_many(["a", "b", "c"]) == {"b": "[1,2]"}
+
+
+def test_cache_entries_depend_on_output_settings(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    key = lambda obj: f"Database3:{obj.id}"
+    db = Database3(1, "john", "john@gmail.com", "123456")
+    db.balance = decimal.Decimal("1.10")
+
+    as_float = MiniFlaskSerializer(cache=SQLiteCacheBackend(path), cache_key=key)
+    as_string = MiniFlaskSerializer(cache=SQLiteCacheBackend(path), cache_key=key, decimal_format="string")
+    as_raw = MiniFlaskSerializer(cache=SQLiteCacheBackend(path), cache_key=key, decimal_format="raw")
+
+    for _ in range(2):
+        assert as_float.serializer(db, include_fields=["balance"]) == {"balance": 1.1}
+        assert as_string.serializer(db, include_fields=["balance"]) == {"balance": "1.10"}
+        assert encode_json(as_raw.serializer(db, include_fields=["balance"])) == '{"balance":1.10}'
+
+    # A hit gives back the same types as the miss, only Decimals are Decimals
+    db.score = 1.5
+    db.history = [{"amount": decimal.Decimal("-0.05"), "rate": 0.25}]
+    fields = ["balance", "score", "history"]
+
+    assert as_raw.serializer(db, include_fields=fields) == as_raw.serializer(db, include_fields=fields) == {
+        "balance": decimal.Decimal("1.10"), "score": 1.5, "history": [{"amount": decimal.Decimal("-0.05"), "rate": 0.25}]
+    }
+    assert type(as_raw.serializer(db, include_fields=fields)["score"]) is float
+
+
+def test_cached_results_can_be_changed_by_the_caller():
+    san = MiniFlaskSerializer(cache=MemoryCacheBackend(), cache_key=lambda obj: f"Database3:{obj.id}")
+    db = Database3(1, "john", "john@gmail.com", "123456")
+
+    san.serializer(db)["injected"] = 1
+    san.serializer(db)["injected"] = 2
+
+    assert "injected" not in san.serializer(db)
+
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_profiler_records_field_paths():
+    profiler = SerializationProfiler()
+    san = MiniFlaskSerializer(profiler=profiler)
+    john = Author(1, "john")
+    john.posts = [Post(1, "first", john), Post(2, "second", john)]
+
+    san.serializer(john.posts, many=True)
+    stats = profiler.stats()
+
+    assert stats["Post"]["count"] == 2
+    assert stats["Post.title"]["count"] == 2
+    assert stats["Post.author"]["count"] == 2
+    assert "Post.author.posts[].title" in stats
+    assert stats["Post.author"]["time"] >= stats["Post.author.name"]["time"]
+
+    lines = profiler.collapsed().splitlines()
+    assert "Post;author;posts[];title" in [line.rsplit(" ", 1)[0] for line in lines]
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profiler_records_stream_and_lazy():
+    profiler = SerializationProfiler()
+    san = MiniFlaskSerializer(profiler=profiler)
+    posts = [Post(i, f"post {i}", Author(i, "john")) for i in range(3)]
+
+    b"".join(san.stream(posts, many=True))
+    stats = profiler.stats()
+
+    assert stats["Post"]["count"] == 3
+    assert stats["Post.author"]["count"] == 3
+    assert stats["Post.author.name"]["count"] == 3
+
+    profiler.reset()
+    lazy = san.serializer(posts[0], lazy=True)
+    lazy["author"]
+    lazy["author"]
+
+    assert profiler.stats()["Post.author"]["count"] == 1
+    assert profiler.stats()["Post.author.name"]["count"] == 1
+
+
+def test_profiler_sample_rate_zero_records_nothing():
+    profiler = SerializationProfiler(sample_rate=0)
+    san = MiniFlaskSerializer(profiler=profiler)
+
+    assert san.serializer(Database3(1, "john", "john@gmail.com", "123456"))["name"] == "john"
+    assert profiler.stats() == {}
+
+
+def test_excluded_and_opt_in_properties_are_never_evaluated(san):
+    calls = []
+
+    class Profile(Database3):
+        __serializer_opt_in__ = ("follower_count",)
+
+        @property
+        def display_name(self):
+            calls.append("display_name")
+            return self.name.title()
+
+        @property
+        def follower_count(self):
+            calls.append("follower_count")
+            return 42
+
+    db = Profile(1, "john", "john@gmail.com", "123456")
+
+    assert san.serializer(db, exclude_fields=["display_name", "password"]) == {"email": "john@gmail.com", "id": 1, "name": "john"}
+    assert calls == []
+
+    assert san.serializer(db, include_fields=["name", "display_name", "follower_count"]) == {
+        "display_name": "John",
+        "follower_count": 42,
+        "name": "john"
+    }
+    assert calls == ["display_name", "follower_count"]
+
+
+def test_binary_policies():
+    db = Database3(1, "john", "john@gmail.com", "123456")
+    db.avatar = bytes(range(250, 256))
+    db.thumb = memoryview(b"\x00\xff")
+
+    result = MiniFlaskSerializer().serializer(db, include_fields=["id", "avatar", "thumb"])
+    assert result == {"avatar": "+vv8/f7/", "id": 1, "thumb": "AP8="}
+
+    result = MiniFlaskSerializer(binary="hex").serializer(db, include_fields=["id", "avatar", "thumb"])
+    assert result == {"avatar": "fafbfcfdfeff", "id": 1, "thumb": "00ff"}
+
+    result = MiniFlaskSerializer(binary="omit").serializer(db, include_fields=["id", "avatar", "thumb"])
+    assert result == {"id": 1}
+
+    lazy = MiniFlaskSerializer(binary="omit").serializer(db, include_fields=["id", "avatar", "thumb"], lazy=True)
+    assert "avatar" not in lazy and len(lazy) == 1
+    assert lazy.to_dict() == dict(lazy) == {"id": 1}
+
+    with pytest.raises(KeyError):
+        lazy["thumb"]
+
+    with pytest.raises(ValueError):
+        MiniFlaskSerializer(binary="utf-8")
+
+
+def test_stream_matches_serializer(san):
+    john = Author(1, "john")
+    posts = [Post(i, f"post {i}", john) for i in range(1, 50)]
+    posts[0].body = bytearray(b"x" * 100_000)
+
+    chunks = list(san.stream(posts, many=True, exclude_fields=["name"], chunk_size=4096))
+
+    assert len(chunks) > 1
+    assert json.loads(b"".join(chunks)) == san.serializer(posts, many=True, exclude_fields=["name"])
+    assert json.loads(b"".join(san.stream(john))) == {"id": 1, "name": "john"}
+
+
+def test_datetime_formats():
+    db = Database3(1, "john", "john@gmail.com", "123456")
+    db.created = datetime.datetime(2025, 9, 20, 10, 30, 0, 123000)
+    db.updated = datetime.datetime(2025, 9, 20, 11, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=1)))
+    db.birthday = datetime.date(1970, 1, 2)
+    db.opens = datetime.time(9, 15)
+    fields = ["created", "updated", "birthday", "opens"]
+
+    assert MiniFlaskSerializer().serializer(db, include_fields=fields) == {
+        "birthday": "1970-01-02",
+        "created": "2025-09-20T10:30:00.123000",
+        "opens": "09:15:00",
+        "updated": "2025-09-20T11:30:00+01:00"
+    }
+
+    assert MiniFlaskSerializer(datetime_format="epoch_ms").serializer(db, include_fields=fields) == {
+        "birthday": 86_400_000,
+        "created": 1758364200123,
+        "opens": "09:15:00",
+        "updated": 1758364200000
+    }
+
+
+def test_decimal_formats():
+    db = Database3(1, "john", "john@gmail.com", "123456")
+    db.balance = decimal.Decimal("12345678901234567.10")
+
+    assert MiniFlaskSerializer().serializer(db, include_fields=["balance"]) == {"balance": 12345678901234568.0}
+    assert MiniFlaskSerializer(decimal_format="string").serializer(db, include_fields=["balance"]) == {"balance": "12345678901234567.10"}
+
+    raw = MiniFlaskSerializer(decimal_format="raw")
+    assert raw.serializer(db, include_fields=["balance"]) == {"balance": decimal.Decimal("12345678901234567.10")}
+    assert b"".join(raw.stream(db, include_fields=["id", "balance"])) == b'{"balance":12345678901234567.10,"id":1}'
+
+
+def test_raw_decimals_leave_strings_alone():
+    db = Database3(1, "\x0042\x00", "john@gmail.com", "123456")
+    db.balance = decimal.Decimal("1.10")
+
+    for decimal_format in ("float", "raw"):
+        streamed = json.loads(b"".join(MiniFlaskSerializer(decimal_format=decimal_format).stream(db)))
+        assert streamed["name"] == "\x0042\x00"
+
+    assert encode_json({"comment": "\x007\x00", "price": decimal.Decimal("-2.50")}) == '{"comment":"\\u00007\\u0000","price":-2.50}'
+
+
+def test_many_with_repeated_item(san):
+    db = Database3(1, "john", "john@gmail.com", "123456")
+
+    assert san.serializer([db, db], many=True, include_fields=["id"]) == [{"id": 1}, {"id": 1}]
+
+
+def test_stream_compression(san):
+    posts = [Post(i, f"post {i}", Author(i, "john")) for i in range(2000)]
+    expected = san.serializer(posts, many=True)
+
+    chunks = list(san.stream(posts, many=True, compress="gzip", chunk_size=1024, flush_size=4096))
+    assert len(chunks) > 2
+    assert json.loads(gzip.decompress(b"".join(chunks))) == expected
+
+    deflated = b"".join(san.stream(posts, many=True, compress="deflate", compress_level=1))
+    assert json.loads(zlib.decompress(deflated)) == expected
+
+    with pytest.raises(ValueError):
+        san.stream(posts, many=True, compress="br")
+
+    with pytest.raises(ValueError):
+        san.stream(posts[0], many=True)
+
+
+def test_trusted_to_dict_skips_filtering(monkeypatch):
+    san = MiniFlaskSerializer(trust_after=2)
+    calls = []
+    filter_data = san._filter_data
+    monkeypatch.setattr(san, "_filter_data", lambda *args, **kwargs: calls.append(1) or filter_data(*args, **kwargs))
+
+    db = Database1(1, "john", "john@gmail.com", "123456")
+
+    for _ in range(4):
+        assert san.serializer(db, exclude_fields=["password"]) == {"id": 1, "name": "john", "email": "john@gmail.com"}
+
+    assert len(calls) == 2
+
+    class WithDates(Database1):
+        def to_dict(self):
+            return {"id": self.id, "created": datetime.date(2025, 9, 20)}
+
+    for _ in range(4):
+        assert san.serializer(WithDates(1, "john", "john@gmail.com", "123456")) == {"id": 1, "created": "2025-09-20"}
+
+    assert len(calls) == 6
+
+
+def test_trust_needs_json_types():
+    san = MiniFlaskSerializer(trust_after=2)
+
+    class Priced(Database1):
+        def to_dict(self):
+            return {"id": self.id, "price": self.price, "paid_at": self.paid_at}
+
+    rows = [Priced(i, "john", "john@gmail.com", "123456") for i in range(4)]
+
+    for row in rows:
+        row.price, row.paid_at = decimal.Decimal("10.25"), None
+
+    rows[-1].price, rows[-1].paid_at = decimal.Decimal("19.99"), datetime.datetime(2025, 9, 20, 10)
+
+    results = [san.serializer(row) for row in rows]
+    assert results[-1] == {"id": 3, "price": 19.99, "paid_at": "2025-09-20T10:00:00"}
+    json.dumps(results)
+
+    class PaidAt(Database1):
+        def to_dict(self):
+            return {"id": self.id, "paid_at": self.paid_at}
+
+    rows = [PaidAt(i, "john", "john@gmail.com", "123456") for i in range(4)]
+
+    for row in rows:
+        row.paid_at = None
+
+    rows[-1].paid_at = datetime.datetime(2025, 9, 20, 10)
+
+    assert [san.serializer(row) for row in rows][-1] == {"id": 3, "paid_at": "2025-09-20T10:00:00"}
+    assert san.serializer(rows[0]) == {"id": 0, "paid_at": None}
+
+
+def test_trusted_class_attribute():
+    class Trusted(Database1):
+        __serializer_trusted__ = True
+
+    san = MiniFlaskSerializer(trust_after=None)
+    db = Trusted(1, "john", "john@gmail.com", "123456")
+
+    assert san.serializer(db, include_fields=["id", "name"]) == {"id": 1, "name": "john"}
+    assert san.serializer(db) == db.to_dict()